@@ -1,262 +1,51 @@
+# Checked before anything else is imported, so a shadowing module fails fast
+import stdlib_guard
+stdlib_guard.check_stdlib_shadowing()
+
 import gradio as gr
-import sqlite3
-import requests
+import asyncio
 import json
 import os
 import pickle
-from bs4 import BeautifulSoup
-from datetime import datetime
-from duckduckgo_search import DDGS
-from fastapi import Request
-import pyttsx3
-from init_db import check_login, register_user
+import time
+import httpx
+import chat_store
+import context_window
+import db
+import db_writer
+import http_client
+import model_catalog
+import prompt_cache
+import resilience
+import response_cache
+import tts
+import usage_log
+# get_webpage_content and web_search are re-exported for test_web_search.py
+from webpage import get_webpage_content, async_get_webpage_content  # noqa: F401
+from search_engine import web_search, async_web_search  # noqa: F401
+from history_search import init_search_index, search_conversations, format_search_results
+from auth import check_login, register_user
 
 # Initialize database
 def init_db():
-    conn = sqlite3.connect('chat_history.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS conversations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT,
-        user_message TEXT,
-        assistant_message TEXT,
-        model TEXT,
-        system_prompt TEXT,
-        username TEXT
-    )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Save conversation to database
-def save_to_db(user_message, assistant_message, model, system_prompt, username=""):
-    conn = sqlite3.connect('chat_history.db')
-    cursor = conn.cursor()
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute(
-        "INSERT INTO conversations (timestamp, user_message, assistant_message, model, system_prompt, username) VALUES (?, ?, ?, ?, ?, ?)",
-        (timestamp, user_message, assistant_message, model, system_prompt, username)
-    )
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        chat_store.init_chat_tables(conn)
+        init_search_index(conn)
+        usage_log.init_usage_table(conn)
 
-# Web search function using DuckDuckGo API (now using duckduckgo-search for real results)
-def web_search(query, num_results=5):
-    try:
-        results = []
-        with DDGS() as ddgs:
-            for r in ddgs.text(query, max_results=num_results):
-                results.append(r)
-                if len(results) >= num_results:
-                    break
-        if not results:
-            return f"No search results found for '{query}'. Try refining your search terms."
-        formatted_results = ""
-        for i, result in enumerate(results, 1):
-            formatted_results += f"{i}. {result.get('title', '[No title]')[:120]}\n"
-            formatted_results += f"   URL: {result.get('href', result.get('url', '[No URL]'))}\n"
-            snippet = result.get('body') or result.get('snippet')
-            if snippet:
-                formatted_results += f"   {snippet[:400]}\n\n"
-            else:
-                formatted_results += f"   [No description available]\n\n"
-        return formatted_results
-    except Exception as e:
-        return f"Error during web search: {str(e)}"
+# Number of turns shown per page in the Previous Conversations panel
+CONVERSATIONS_PAGE_SIZE = int(os.environ.get("CONVERSATIONS_PAGE_SIZE", 20))
 
-# Wikipedia search as a fallback
-def wikipedia_search(query, num_results=3):
-    try:
-        # Wikipedia API endpoint
-        search_url = "https://en.wikipedia.org/w/api.php"
-        
-        # First, search for relevant articles
-        search_params = {
-            'action': 'query',
-            'list': 'search',
-            'srsearch': query,
-            'format': 'json',
-            'srlimit': num_results
-        }
-        
-        response = requests.get(search_url, params=search_params)
-        if response.status_code != 200:
-            return None
-        
-        data = response.json()
-        if 'query' not in data or 'search' not in data['query']:
-            return None
-        
-        search_results = []
-        
-        # For each search result, get a summary
-        for result in data['query']['search']:
-            title = result['title']
-            page_id = result['pageid']
-            
-            # Get the summary for this article
-            summary_params = {
-                'action': 'query',
-                'prop': 'extracts',
-                'exintro': True,
-                'explaintext': True,
-                'pageids': page_id,
-                'format': 'json'
-            }
-            
-            summary_response = requests.get(search_url, params=summary_params)
-            if summary_response.status_code == 200:
-                summary_data = summary_response.json()
-                if 'query' in summary_data and 'pages' in summary_data['query']:
-                    page_data = summary_data['query']['pages'][str(page_id)]
-                    snippet = page_data.get('extract', '')
-                    
-                    # Truncate long snippets
-                    if len(snippet) > 300:
-                        snippet = snippet[:300] + "..."
-                    
-                    search_results.append({
-                        'title': title,
-                        'link': f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
-                        'snippet': snippet
-                    })
-        
-        # Format results
-        formatted_results = "Wikipedia Search Results:\n\n"
-        for i, result in enumerate(search_results, 1):
-            formatted_results += f"{i}. {result['title']}\n"
-            formatted_results += f"   URL: {result['link']}\n"
-            if result['snippet']:
-                formatted_results += f"   {result['snippet']}\n\n"
-            else:
-                formatted_results += f"   [No description available]\n\n"
-        
-        return formatted_results if search_results else None
-    
-    except Exception as e:
-        print(f"Wikipedia search error: {str(e)}")
-        return None
-
-# Function to get webpage content
-def get_webpage_content(url):
-    try:
-        # Check if URL has a scheme, add https:// if not
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-            
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        # Set a timeout to avoid hanging on slow websites
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code != 200:
-            return f"Error: Could not fetch the webpage. Status code: {response.status_code}"
-            
-        # Try to detect the encoding
-        if response.encoding == 'ISO-8859-1':
-            # Try to find better encoding
-            possible_encoding = response.apparent_encoding
-            if possible_encoding and possible_encoding.lower() != 'iso-8859-1':
-                response.encoding = possible_encoding
-                
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Try to get the main content
-        main_content = None
-        
-        # Look for common content containers
-        for container in ['main', 'article', 'div.content', 'div.main-content', '#content', '#main']:
-            content = soup.select_one(container)
-            if content and len(content.get_text(strip=True)) > 200:  # Ensure it has substantial content
-                main_content = content
-                break
-        
-        # If no main content container found, use the whole body
-        if not main_content:
-            main_content = soup
-        
-        # Remove unwanted elements
-        for element in main_content(["script", "style", "nav", "header", "footer", "aside", "iframe", "noscript", 
-                                    "meta", "button", "svg", "form", "input", "textarea"]):
-            element.extract()
-            
-        # Remove elements with common ad/nav/sidebar class names
-        for element in main_content.select('.ad, .ads, .advertisement, .sidebar, .nav, .menu, .comment, .footer, .header'):
-            element.extract()
-            
-        # Get text
-        text = main_content.get_text()
-        
-        # Process text
-        lines = (line.strip() for line in text.splitlines())
-        # Break multi-headlines into a line each
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        # Remove blank lines and join with newlines
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        # Remove excessive newlines (more than 2 in a row)
-        import re
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # Get page title
-        title = soup.title.string if soup.title else "No title"
-        
-        # Format the output with title and URL
-        formatted_text = f"Title: {title.strip()}\nURL: {url}\n\n{text}"
-        
-        # Limit text length to avoid token limits
-        if len(formatted_text) > 8000:
-            formatted_text = formatted_text[:8000] + "...\n[Content truncated due to length]"
-            
-        return formatted_text
-    
-    except requests.exceptions.Timeout:
-        return f"Error: Request to {url} timed out after 10 seconds."
-    except requests.exceptions.ConnectionError:
-        return f"Error: Could not connect to {url}. Please check the URL and try again."
-    except requests.exceptions.MissingSchema:
-        return f"Error: Invalid URL format for {url}. Make sure it includes http:// or https://."
-    except Exception as e:
-        return f"Error fetching webpage: {str(e)}"
+def format_conversations(rows):
+    return '\n'.join(f"User: {user}\nAssistant: {assistant}\n{'-'*30}" for _, user, assistant in rows)
 
-# Function to fetch available models from OpenRouter
+# Function to fetch available models from OpenRouter. The catalog is cached on
+# disk and revalidated with ETag/If-Modified-Since, so an unchanged list is a 304.
 def fetch_available_models(api_key, base_url="https://openrouter.ai/api/v1"):
-    try:
-        url = f"{base_url}/models"
-        
-        headers = {
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            models_data = response.json()
-            available_models = {}
-            
-            if 'data' in models_data:
-                for model in models_data['data']:
-                    if 'id' in model and 'name' in model:
-                        # Use the model's name as the key and ID as the value
-                        available_models[model['name']] = model['id']
-            
-            return available_models
-        else:
-            print(f"Error fetching models: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Error fetching models: {str(e)}")
-        return None
+    return model_catalog.refresh_models(api_key, base_url, force=True)
 
-# OpenRouter API call
-def chat_with_openrouter(messages, model, api_key, base_url="https://openrouter.ai/api/v1"):
+# Build the URL, headers and JSON body for an OpenRouter chat completion
+def openrouter_request(messages, model, api_key, base_url, stream):
     url = f"{base_url}/chat/completions"
     
     headers = {
@@ -266,53 +55,258 @@ def chat_with_openrouter(messages, model, api_key, base_url="https://openrouter.
     
     data = {
         "model": model,
-        "messages": messages
+        # Mark the stable prefix for providers that need explicit cache breakpoints
+        "messages": prompt_cache.add_cache_breakpoints(messages, model),
     }
+    # Ask OpenRouter for token counts (including cached prompt tokens) and cost;
+    # other OpenAI-compatible servers may reject the unknown field
+    if model_catalog.is_openrouter(base_url):
+        data["usage"] = {"include": True}
+    if stream:
+        data["stream"] = True
     
+    return url, headers, data
+
+# JSON body for a completion request. Messages built by context_window carry
+# their own JSON, which is spliced in instead of serializing the history again.
+def request_body(data):
+    serialized = getattr(data["messages"], "serialized", None)
+    if serialized is None:
+        return json.dumps(data)
+    return json.dumps(dict(data, messages=None)).replace('"messages": null', '"messages": ' + serialized, 1)
+
+def completion_content(response_data):
+    if 'choices' in response_data and len(response_data['choices']) > 0:
+        return response_data['choices'][0]['message']['content']
+    else:
+        return f"Error: {json.dumps(response_data)}"
+
+# Marker returned by parse_sse_line for the "[DONE]" terminator
+STREAM_DONE = object()
+
+# Decode one SSE line of a completion stream: None for keep-alives and comments
+# (e.g. ": OPENROUTER PROCESSING"), STREAM_DONE at the end, else the JSON chunk
+def parse_sse_line(line):
+    if not line or not line.startswith("data:"):
+        return None
+    payload = line[5:].strip()
+    if payload == "[DONE]":
+        return STREAM_DONE
+    return json.loads(payload)
+
+def chunk_delta(chunk):
+    if chunk.get('choices'):
+        return chunk['choices'][0].get('delta', {}).get('content')
+    return None
+
+# Fallback models tried in order when the selected one keeps failing after
+# retries: comma-separated model IDs or names from MODELS
+def fallback_models():
+    names = [name.strip() for name in os.environ.get("LLM_FALLBACK_MODELS", "").split(",") if name.strip()]
+    return [MODELS.get(name, name) for name in names]
+
+# Extract the reply from a non-streamed completion, caching it if it succeeded
+# and recording its usage. result is what a completion attempt yields.
+def cache_completion(url, data, result, latency=None):
+    response_data = result["response"]
+    usage = response_data.get("usage") if isinstance(response_data, dict) else None
+    usage_log.record_usage(result["model"], usage, latency, latency)
+    content = completion_content(response_data)
+    # Replies from a fallback model are not cached as the requested model's
+    if 'choices' in response_data and response_data['choices'] and result["model"] == data["model"]:
+        response_cache.store(url, data, content)
+    return content
+
+# Completion attempts yield content deltas (str), then a dict with the model
+# that answered and its "usage" (streams) or full "response" (non-streamed).
+# A failure worth retrying that happens before any content was produced raises
+# RetryableError; other errors are yielded as "Error: ..." text and end the
+# attempt without the dict.
+
+async def async_complete_attempt(url, headers, data):
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(data))
-        response_data = response.json()
-        
-        if 'choices' in response_data and len(response_data['choices']) > 0:
-            return response_data['choices'][0]['message']['content']
-        else:
-            return f"Error: {json.dumps(response_data)}"
+        response = await http_client.async_post(url, headers=headers, content=request_body(data), timeout=http_client.ASYNC_LLM_TIMEOUT)
+    except httpx.TransportError as e:
+        raise resilience.RetryableError(str(e) or type(e).__name__)
+    if response.status_code in resilience.RETRYABLE_STATUS:
+        raise resilience.status_error(response.status_code, response.text, response.headers)
+    yield {"model": data["model"], "response": response.json()}
+
+async def async_stream_attempt(url, headers, data):
+    produced = False
+    try:
+        async with http_client.async_stream("POST", url, headers=headers, content=request_body(data), timeout=http_client.ASYNC_LLM_TIMEOUT) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode('utf-8', errors='replace')
+                if response.status_code in resilience.RETRYABLE_STATUS:
+                    raise resilience.status_error(response.status_code, body, response.headers)
+                yield f"Error: {body}"
+                return
+            
+            usage = None
+            async for line in response.aiter_lines():
+                chunk = parse_sse_line(line)
+                if chunk is None:
+                    continue
+                if chunk is STREAM_DONE:
+                    break
+                if 'error' in chunk:
+                    check_stream_error(chunk['error'], produced)
+                    yield f"Error: {json.dumps(chunk['error'])}"
+                    return
+                # The usage block arrives in the last chunk before [DONE]
+                usage = chunk.get('usage') or usage
+                delta = chunk_delta(chunk)
+                if delta:
+                    produced = True
+                    yield delta
+            yield {"model": data["model"], "usage": usage}
+    except httpx.TransportError as e:
+        if produced:
+            yield f"Error: {str(e)}"
+            return
+        raise resilience.RetryableError(str(e) or type(e).__name__)
+
+# An error event in the stream (the provider failed after the response started)
+# is retried if nothing was shown yet and its code says it is transient
+def check_stream_error(error, produced):
+    if not produced and isinstance(error, dict) and error.get('code') in resilience.RETRYABLE_STATUS:
+        raise resilience.RetryableError(json.dumps(error), error.get('code'))
+
+# First-token latency of streams and full latency of other requests are tracked separately
+def latency_key(data):
+    return (data["model"], bool(data.get("stream")))
+
+# Run attempt(url, headers, data) for the requested model and then the
+# fallbacks, retrying each with backoff, and yield the items of the first
+# attempt that gets going. Ends with "Error: ..." if every model failed. Also
+# hedges: if the first item is slower than the model's usual first-token
+# latency, a duplicate request races the original.
+async def async_resilient_attempts(attempt, url, headers, data):
+    error = None
+    for model in resilience.model_chain(data["model"], fallback_models()):
+        model_data = dict(data, model=model)
+        for retry in range(resilience.RETRY_ATTEMPTS):
+            started = time.monotonic()
+            try:
+                items, item = await resilience.first_item(lambda: attempt(url, headers, model_data),
+                                                          resilience.hedge_delay(latency_key(model_data)))
+            except resilience.RetryableError as e:
+                error = e
+                delay = resilience.backoff_delay(retry, e.retry_after)
+                if delay is None or retry + 1 == resilience.RETRY_ATTEMPTS:
+                    break
+                print(f"Retrying {model} in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+            except StopAsyncIteration:
+                return
+            resilience.latency.record(latency_key(model_data), time.monotonic() - started)
+            if model != data["model"]:
+                print(f"Falling back from {data['model']} to {model}")
+            yield item
+            async for item in items:
+                yield item
+            return
+        print(f"Model {model} failed: {str(error)}")
+    yield f"Error: {str(error)}"
+
+# Async OpenRouter API call: await it for the full text, or iterate it with
+# "async for" when stream=True to receive content deltas
+def async_chat_with_openrouter(messages, model, api_key, base_url="https://openrouter.ai/api/v1", stream=False):
+    url, headers, data = openrouter_request(messages, model, api_key, base_url, stream)
+    on_complete = lambda text: response_cache.store(url, data, text)
+    if stream:
+        return async_stream_openrouter_response(url, headers, data, on_complete)
+    return async_complete_openrouter(url, headers, data)
+
+async def async_complete_openrouter(url, headers, data):
+    cached = await response_cache.async_lookup(url, data)
+    if cached is not None:
+        return cached
+    try:
+        started = time.monotonic()
+        async for item in async_resilient_attempts(async_complete_attempt, url, headers, data):
+            if isinstance(item, str):
+                return item
+            return cache_completion(url, data, item, time.monotonic() - started)
     except Exception as e:
         return f"Error: {str(e)}"
 
-# Chat function for Gradio
-def chat(message, history, model, system_prompt, api_key, enable_web_search, base_url, current_user):
+async def async_stream_openrouter_response(url, headers, data, on_complete=None):
+    cached = await response_cache.async_lookup(url, data)
+    if cached is not None:
+        yield cached
+        return
     try:
+        started = time.monotonic()
+        parts = []
+        first_token_latency = None
+        async for item in async_resilient_attempts(async_stream_attempt, url, headers, data):
+            if isinstance(item, dict):
+                usage_log.record_usage(item["model"], item["usage"], first_token_latency, time.monotonic() - started)
+                if on_complete and item["model"] == data["model"]:
+                    on_complete(''.join(parts))
+                continue
+            if first_token_latency is None:
+                first_token_latency = time.monotonic() - started
+            parts.append(item)
+            yield item
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+# Retrieval for one chat turn ("search:" results or "url:" page content). It runs
+# at most once, so respond can show the results and chat can prompt with them
+# without searching or fetching twice.
+class RetrievalContext:
+    def __init__(self, message, enable_web_search):
+        self.kind = None
+        self.target = None
+        self._results = None
+        if enable_web_search and message.lower().startswith("search:"):
+            self.kind = "search"
+            self.target = message[7:].strip()
+        elif enable_web_search and message.lower().startswith("url:"):
+            self.kind = "url"
+            self.target = message[4:].strip()
+
+    async def results(self):
+        if self._results is None:
+            if self.kind == "search":
+                # Inform the user that search is in progress
+                print(f"Searching for: {self.target}")
+                self._results = await async_web_search(self.target)
+            elif self.kind == "url":
+                # Inform the user that content fetching is in progress
+                print(f"Fetching content from: {self.target}")
+                self._results = await async_get_webpage_content(self.target)
+        return self._results
+
+# Chat function for Gradio; yields the reply accumulated so far as tokens stream in.
+# Runs on the event loop, so network calls are awaited and blocking work is sent to threads.
+# Pass the turn's RetrievalContext if its results were already fetched.
+async def chat(message, history, model, system_prompt, api_key, enable_web_search, base_url, current_user, retrieval=None, conversation=None):
+    try:
+        if retrieval is None:
+            retrieval = RetrievalContext(message, enable_web_search)
+        
         # Check if API key is provided
         if not api_key:
-            return "Error: Please provide an OpenRouter API key in the settings panel."
+            yield "Error: Please provide an OpenRouter API key in the settings panel."
+            return
             
-        # Format messages for API
-        messages = []
-        
-        # Add system prompt if provided
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        
-        # Add chat history
-        for human, assistant in history:
-            messages.append({"role": "user", "content": human})
-            messages.append({"role": "assistant", "content": assistant})
-        
         # Add current message
         current_message = message
         
         # Check if web search is enabled and message contains a search command
-        if enable_web_search and message.lower().startswith("search:"):
-            search_query = message[7:].strip()
+        if retrieval.kind == "search":
+            search_query = retrieval.target
             if not search_query:
-                return "Please provide a search query after 'search:'"
+                yield "Please provide a search query after 'search:'"
+                return
             
-            # Inform the user that search is in progress
-            print(f"Searching for: {search_query}")
-            
-            # Perform the search
-            search_results = web_search(search_query)
+            # Perform the search (reuses results respond already fetched)
+            search_results = await retrieval.results()
             
             # Create a prompt that helps the model use the search results effectively
             current_message = (
@@ -326,16 +320,14 @@ def chat(message, history, model, system_prompt, api_key, enable_web_search, bas
             )
         
         # Check if the message is a URL to fetch content
-        elif enable_web_search and message.lower().startswith("url:"):
-            url = message[4:].strip()
+        elif retrieval.kind == "url":
+            url = retrieval.target
             if not url:
-                return "Please provide a URL after 'url:'"
-            
-            # Inform the user that content fetching is in progress
-            print(f"Fetching content from: {url}")
+                yield "Please provide a URL after 'url:'"
+                return
             
             # Fetch the webpage content
-            webpage_content = get_webpage_content(url)
+            webpage_content = await retrieval.results()
             
             # Create a prompt that helps the model summarize the content effectively
             current_message = (
@@ -347,23 +339,29 @@ def chat(message, history, model, system_prompt, api_key, enable_web_search, bas
                 f"If there are any limitations in the extracted content, acknowledge them in your response."
             )
         
-        messages.append({"role": "user", "content": current_message})
+        # Format messages for API: system prompt plus as much recent history as fits the model's context
+        summarize = lambda summary_messages: async_chat_with_openrouter(summary_messages, model, api_key, base_url)
+        messages = await context_window.build_messages(model, system_prompt, history, current_message, summarize, conversation, base_url)
         
-        # Get response from OpenRouter
-        response = chat_with_openrouter(messages, model, api_key, base_url)
+        # Stream the response from OpenRouter, yielding the text accumulated so far
+        response = ""
+        async for delta in async_chat_with_openrouter(messages, model, api_key, base_url, stream=True):
+            response += delta
+            yield response
         
-        # Save to database
+        # Save to database, as a turn of this chat's session
         try:
-            save_to_db(message, response, model, system_prompt, current_user)
+            if conversation is not None and conversation.session_key is None:
+                conversation.session_key = chat_store.new_session_key()
+            session_key = conversation.session_key if conversation is not None else None
+            chat_store.save_turn(session_key, message, response, model, system_prompt, current_user)
         except Exception as db_error:
             print(f"Warning: Could not save to database: {str(db_error)}")
         
-        return response
-        
     except Exception as e:
         error_message = f"An error occurred: {str(e)}"
         print(error_message)
-        return error_message
+        yield error_message
 
 # Available models
 MODELS = {
@@ -563,11 +561,21 @@ init_db()
 
 ALLOWED_IP = os.environ.get("ALLOWED_IP", "YOUR_IP_ADDRESS")  # Replace with your actual IP or set as env var
 API_KEY = os.environ.get("API_KEY", "your_api_key_here")  # Set your API key here or as env var
+# Max chats streamed at once; unset means no limit
+CHAT_CONCURRENCY_LIMIT = int(os.environ["CHAT_CONCURRENCY_LIMIT"]) if os.environ.get("CHAT_CONCURRENCY_LIMIT") else None
 
-def is_request_from_allowed_ip(request: Request):
+# request is the fastapi.Request of the incoming call
+def is_request_from_allowed_ip(request):
     client_ip = request.client.host
     return client_ip == ALLOWED_IP
 
+# Name -> ID map of models fetched from OpenRouter, used by respond to resolve the dropdown
+dynamic_models = None
+
+def set_dynamic_models(models):
+    global dynamic_models
+    dynamic_models = models
+
 # Create Gradio interface
 with gr.Blocks(css=custom_css) as demo:
     gr.HTML("""
@@ -604,7 +612,7 @@ with gr.Blocks(css=custom_css) as demo:
         success, msg = register_user(username, password)
         return gr.update(value=msg)
 
-    login_btn.click(
+    login_event = login_btn.click(
         handle_login,
         [login_username, login_password],
         [login_status, current_user]
@@ -619,10 +627,11 @@ with gr.Blocks(css=custom_css) as demo:
     # Load saved settings
     saved_settings = load_settings()
     
-    # Try to fetch available models if API key is provided
-    dynamic_models = None
+    # Start from the cached model catalog so startup never waits on the network,
+    # and revalidate it in the background when it is stale
     if saved_settings["api_key"]:
-        dynamic_models = fetch_available_models(saved_settings["api_key"], saved_settings["base_url"])
+        dynamic_models = model_catalog.load_cached_models(saved_settings["base_url"])
+        model_catalog.refresh_in_background(saved_settings["api_key"], saved_settings["base_url"], on_update=set_dynamic_models)
     
     # Use fetched models if available, otherwise use the predefined list
     model_choices = list(dynamic_models.keys()) if dynamic_models else list(MODELS.keys())
@@ -637,7 +646,9 @@ with gr.Blocks(css=custom_css) as demo:
                 avatar_images=(None, "https://api.dicebear.com/7.x/bottts/svg?seed=openrouter"),
                 height=600
             )
-            audio_output = gr.Audio(label="Bot Reads Out Loud", interactive=False, type="filepath")
+            # Per-session message state, so each turn only serializes what's new
+            conversation_state = gr.State(context_window.Conversation())
+            audio_output = gr.Audio(label="Bot Reads Out Loud", interactive=False, streaming=True, autoplay=True)
             
             # Add language selection dropdown for TTS
             tts_lang_dropdown = gr.Dropdown(
@@ -734,10 +745,11 @@ with gr.Blocks(css=custom_css) as demo:
     """)
     
     # Set up event handlers
-    def respond(message, chat_history, model_name, system_prompt, api_key, enable_web_search, base_url, tts_lang, current_user):
+    async def respond(message, chat_history, model_name, system_prompt, api_key, enable_web_search, base_url, tts_lang, current_user, conversation):
         try:
             if not message.strip():
-                return "", chat_history, None
+                yield "", chat_history, b""
+                return
             # Try to get model ID from dynamic models first, then fall back to predefined models
             if dynamic_models and model_name in dynamic_models:
                 model_id = dynamic_models[model_name]
@@ -745,25 +757,30 @@ with gr.Blocks(css=custom_css) as demo:
                 model_id = MODELS[model_name]
             else:
                 model_id = "anthropic/claude-3-opus"
-            if enable_web_search and message.lower().startswith("search:"):
-                search_query = message[7:].strip()
-                if not search_query:
-                    chat_history.append((message, "Please provide a search query after 'search:'"))
-                    return "", chat_history, None
-                search_results = web_search(search_query)
-                chat_history.append((message, search_results))
-                bot_message = chat(message, chat_history[:-1], model_id, system_prompt, api_key, enable_web_search, base_url, current_user)
-                chat_history.append(("[AI Response]", bot_message))
-            else:
-                bot_message = chat(message, chat_history, model_id, system_prompt, api_key, enable_web_search, base_url, current_user)
-                chat_history.append((message, bot_message))
-            # Generate TTS audio for the bot's reply, using selected language
-            audio_path = text_to_speech(bot_message, lang=tts_lang) if bot_message else None
-            return "", chat_history, audio_path
+            retrieval = RetrievalContext(message, enable_web_search)
+            # The reply is spoken sentence by sentence while it streams in, in the selected language
+            speech = tts.SpeechStream(tts_lang)
+            if retrieval.kind == "search" and not retrieval.target:
+                chat_history.append((message, "Please provide a search query after 'search:'"))
+                yield "", chat_history, b""
+                return
+            # Search results only go into the prompt chat builds; the history
+            # keeps the turn as the user asked it and the model answered it
+            prior_history = list(chat_history)
+            chat_history.append((message, ""))
+            async for partial in chat(message, prior_history, model_id, system_prompt, api_key, enable_web_search, base_url, current_user, retrieval, conversation):
+                chat_history[-1] = (message, partial)
+                speech.feed(partial)
+                yield "", chat_history, speech.ready()
+            bot_message = chat_history[-1][1]
+            # Speak whatever is left of the reply; earlier sentences are already playing
+            speech.close(bot_message)
+            async for audio in speech.rest():
+                yield "", chat_history, audio
         except Exception as e:
             error_message = f"Error: {str(e)}"
             chat_history.append((message, error_message))
-            return "", chat_history, None
+            yield "", chat_history, b""
     
     def save_user_settings(api_key, base_url, system_prompt, enable_web_search):
         result = save_settings(api_key, base_url, system_prompt, enable_web_search)
@@ -775,22 +792,27 @@ with gr.Blocks(css=custom_css) as demo:
         
         fetched_models = fetch_available_models(api_key, base_url)
         if fetched_models:
+            set_dynamic_models(fetched_models)
             model_names = list(fetched_models.keys())
             default = "Claude 3 Opus" if "Claude 3 Opus" in model_names else model_names[0]
             return gr.update(value="Models list refreshed successfully!", visible=True), gr.update(choices=model_names, value=default)
         else:
             return gr.update(value="Failed to fetch models. Check your API key and connection.", visible=True), gr.update()
     
+    # respond is async and spends its time awaiting the network, so it does not
+    # need a worker thread per chat; let many chats run at once on the event loop
     msg.submit(
         respond,
-        [msg, chatbot, model_dropdown, system_prompt, api_key, enable_web_search, base_url, tts_lang_dropdown, current_user],
-        [msg, chatbot, audio_output]
+        [msg, chatbot, model_dropdown, system_prompt, api_key, enable_web_search, base_url, tts_lang_dropdown, current_user, conversation_state],
+        [msg, chatbot, audio_output],
+        concurrency_limit=CHAT_CONCURRENCY_LIMIT
     )
     
     submit_btn.click(
         respond,
-        [msg, chatbot, model_dropdown, system_prompt, api_key, enable_web_search, base_url, tts_lang_dropdown, current_user],
-        [msg, chatbot, audio_output]
+        [msg, chatbot, model_dropdown, system_prompt, api_key, enable_web_search, base_url, tts_lang_dropdown, current_user, conversation_state],
+        [msg, chatbot, audio_output],
+        concurrency_limit=CHAT_CONCURRENCY_LIMIT
     )
     
     save_settings_btn.click(
@@ -807,55 +829,85 @@ with gr.Blocks(css=custom_css) as demo:
     
     clear_btn.click(lambda: None, None, chatbot, queue=False)
 
-    # Function to fetch and format all previous conversations
-    def get_all_conversations():
-        conn = sqlite3.connect('chat_history.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT user_message, assistant_message FROM conversations ORDER BY id DESC")
-        rows = cursor.fetchall()
-        conn.close()
-        if not rows:
-            return "No previous conversations."
-        formatted = []
-        for user, assistant in rows:
-            formatted.append(f"User: {user}\nAssistant: {assistant}\n{'-'*30}")
-        return '\n'.join(formatted)
+    # Which saved turns the panel currently shows, so paging only fetches new rows
+    convo_cursor = gr.State({"oldest": None, "newest": None})
 
-    # Set the value of the previous conversations box on load
-    previous_convos.value = get_all_conversations()
+    # Show the latest page of the current user's conversations
+    def load_conversations(current_user):
+        # Include turns still waiting in the write-behind queue
+        chat_store.chat_writer.flush()
+        rows = chat_store.get_conversations_page(current_user, limit=CONVERSATIONS_PAGE_SIZE)
+        if not rows:
+            return "No previous conversations.", {"oldest": None, "newest": None}
+        return format_conversations(rows), {"oldest": rows[-1][0], "newest": rows[0][0]}
+
+    # Prepend turns saved since the newest one shown
+    def load_newer_conversations(current_user, shown, cursor):
+        if cursor["newest"] is None:
+            return load_conversations(current_user)
+        chat_store.chat_writer.flush()
+        rows = chat_store.get_conversations_page(current_user, after_id=cursor["newest"], limit=CONVERSATIONS_PAGE_SIZE)
+        if not rows:
+            return shown, cursor
+        cursor = dict(cursor, newest=rows[0][0])
+        return format_conversations(rows) + '\n' + shown, cursor
+
+    # Append the page of turns older than the oldest one shown
+    def load_older_conversations(current_user, shown, cursor):
+        if cursor["oldest"] is None:
+            return shown, cursor
+        rows = chat_store.get_conversations_page(current_user, before_id=cursor["oldest"], limit=CONVERSATIONS_PAGE_SIZE)
+        if not rows:
+            return shown, cursor
+        cursor = dict(cursor, oldest=rows[-1][0])
+        return shown + '\n' + format_conversations(rows), cursor
+
+    # Search the current user's saved turns
+    def search_history(current_user, query):
+        if not query.strip():
+            return ""
+        chat_store.chat_writer.flush()
+        return format_search_results(search_conversations(current_user, query))
+
+    # Usage per model, then how far behind the database writers are
+    def show_usage():
+        writers = {"chat history": chat_store.chat_writer, "usage": usage_log.usage_writer}
+        return usage_log.format_usage_summary(usage_log.usage_summary()) + "\n\n" + db_writer.format_writer_stats(writers)
 
-    # Add a manual refresh button for chat history
-    refresh_convos_btn = gr.Button("Refresh Chat History")
+    with gr.Row():
+        # Add a manual refresh button for chat history
+        refresh_convos_btn = gr.Button("Refresh Chat History")
+        load_older_btn = gr.Button("Load Older Conversations")
     refresh_convos_btn.click(
-        lambda: get_all_conversations(),
-        None,
-        previous_convos
+        load_newer_conversations,
+        [current_user, previous_convos, convo_cursor],
+        [previous_convos, convo_cursor]
+    )
+    load_older_btn.click(
+        load_older_conversations,
+        [current_user, previous_convos, convo_cursor],
+        [previous_convos, convo_cursor]
     )
 
-def text_to_speech(text, lang='en', filename='tts_output.wav'):
-    try:
-        engine = pyttsx3.init()
-        # Set language/voice if possible
-        if lang == 'ne':
-            # Nepali support depends on system voices; fallback to default if not found
-            voices = engine.getProperty('voices')
-            nepali_voice = next((v for v in voices if 'ne' in v.id or 'Nepali' in v.name), None)
-            if nepali_voice:
-                engine.setProperty('voice', nepali_voice.id)
-        else:
-            # Default to English
-            voices = engine.getProperty('voices')
-            en_voice = next((v for v in voices if 'en' in v.id or 'English' in v.name), None)
-            if en_voice:
-                engine.setProperty('voice', en_voice.id)
-        engine.save_to_file(text, filename)
-        engine.runAndWait()
-        return filename
-    except Exception as e:
-        print(f"pyttsx3 TTS error: {e}")
-        return None
+    history_query = gr.Textbox(label="Search Chat History", placeholder="Words to find in your previous conversations")
+    history_results = gr.Markdown()
+    history_query.submit(search_history, [current_user, history_query], [history_results])
+
+    # Tokens, cached prompt tokens, cost and latency recorded per model
+    with gr.Accordion("Model Usage", open=False):
+        usage_btn = gr.Button("Show Usage")
+        usage_table = gr.Markdown()
+    usage_btn.click(show_usage, None, [usage_table])
+
+    # Fill the panel when the page opens and again after logging in
+    demo.load(load_conversations, [current_user], [previous_convos, convo_cursor])
+    login_event.then(load_conversations, [current_user], [previous_convos, convo_cursor])
 
 # Launch the app
 if __name__ == "__main__":
+    # Load tiktoken and its vocabulary in the background while the server
+    # starts, rather than at import (bench_startup.py keeps it lazy) or on the
+    # first chat
+    context_window.warm_encoding()
     port = int(os.environ.get("PORT", 8080))
     demo.launch(server_name="0.0.0.0", server_port=port)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+# Synthesized speech is kept as WAV files named by the hash of what produced
+# them (text, language and voice), so repeated replies are never synthesized
+# twice and concurrent sessions can't overwrite each other's audio.
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+# Eviction trims the cache to this fraction of the budget, so it doesn't run
+# again on the very next write
+PRUNE_TARGET = 0.9
+
+def audio_key(text, lang, voice):
+    canonical = "\0".join([lang or "", voice or "", text])
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# Directory of content-addressed audio files with an LRU size budget. A file's
+# modification time is its last use; when the total size goes over the budget,
+# the least recently used files are deleted in the background.
+class AudioCache:
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or TTS_CACHE_DIR
+        self.max_bytes = TTS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        # Synthesis writes here first and moves finished files into place
+        self.partial_directory = os.path.join(self.directory, "partial")
+        os.makedirs(self.partial_directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._size = sum(size for _, _, size in self._entries())
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.wav")
+
+    # Path to write new audio to before store() moves it into the cache
+    def partial_path(self, key):
+        handle, path = tempfile.mkstemp(prefix=f"{key}.", suffix=".wav", dir=self.partial_directory)
+        os.close(handle)
+        return path
+
+    # Path of the cached audio for key, or None on a miss
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    # Move a finished file into the cache under key and return its new path
+    def store(self, key, partial_path):
+        path = self.path(key)
+        size = os.path.getsize(partial_path)
+        # Another worker may have stored the same audio meanwhile
+        if os.path.exists(path):
+            size -= os.path.getsize(path)
+        os.replace(partial_path, path)
+        with self._lock:
+            self._size += size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            threading.Thread(target=self.prune, args=(False,), daemon=True).start()
+        return path
+
+    # (mtime, path, size) of every cached file
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".wav") or not entry.is_file():
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        except OSError as e:
+            print(f"Warning: Could not read TTS cache {self.directory}: {str(e)}")
+        return entries
+
+    # Delete the least recently used files until the cache is back under budget.
+    # Background prunes pass blocking=False and skip if another prune is running.
+    def prune(self, blocking=True):
+        if not self._prune_lock.acquire(blocking=blocking):
+            return
+        try:
+            entries = sorted(self._entries())
+            size = sum(entry[2] for entry in entries)
+            target = self.max_bytes * PRUNE_TARGET if size > self.max_bytes else size
+            for _, path, file_size in entries:
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    size -= file_size
+                except OSError:
+                    pass
+            with self._lock:
+                self._size = size
+        finally:
+            self._prune_lock.release()
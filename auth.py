@@ -0,0 +1,23 @@
+import sqlite3
+import hashlib
+import db
+
+# User accounts live in the users table of the chat database (created by init_db)
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def register_user(username, password):
+    try:
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", 
+                         (username, hash_password(password)))
+        return True, "Registration successful!"
+    except sqlite3.IntegrityError:
+        return False, "Username already exists."
+
+def check_login(username, password):
+    row = db.query_one("SELECT password_hash FROM users WHERE username = ?", (username,))
+    if row and row[0] == hash_password(password):
+        return True
+    return False
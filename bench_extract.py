@@ -0,0 +1,77 @@
+# Benchmark the HTML extractors on a corpus of saved pages.
+#
+#   python bench_extract.py [corpus_dir] [--repeat N]
+#
+# corpus_dir holds *.html files (e.g. saved with "curl -o page.html URL");
+# without one, a synthetic corpus of typical article/blog/docs layouts is used.
+# Reports mean time per page for each backend and how many pages produce
+# exactly the same text as the reference html.parser backend.
+import os
+import sys
+import glob
+import time
+import random
+import html_extract
+
+def synthetic_corpus(count=30, seed=1):
+    rng = random.Random(seed)
+    words = ("performance cache latency parser stream token model search result page content "
+             "article section python request response server client network budget").split()
+
+    def paragraph(n):
+        return ' '.join(rng.choice(words) for _ in range(n)).capitalize() + '.'
+
+    pages = []
+    for i in range(count):
+        layout = i % 3
+        body = ''.join(f"<h2>Section {j}</h2><p>{paragraph(rng.randint(40, 120))}</p>"
+                       f"<div class=\"ad\">Buy now {j}</div>" for j in range(rng.randint(5, 60)))
+        chrome = ("<header><nav><ul>" + ''.join(f"<li><a href='/{k}'>Link {k}</a></li>" for k in range(40)) +
+                  "</ul></nav></header><script>var x = 1;</script><style>p { color: red }</style>")
+        if layout == 0:
+            main = f"<main><article>{body}</article></main>"
+        elif layout == 1:
+            main = f"<div id=\"content\">{body}<div class=\"comment\">{paragraph(30)}</div></div>"
+        else:
+            main = f"<div class=\"wrapper\">{body}</div>"
+        aside = f"<aside class=\"sidebar\">{paragraph(50)}</aside><footer>Copyright</footer>"
+        pages.append((f"synthetic-{i}.html",
+                      f"<!DOCTYPE html><html><head><title>Page {i}</title><meta charset=\"utf-8\"></head>"
+                      f"<body>{chrome}{main}{aside}</body></html>"))
+    return pages
+
+def load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html')) + glob.glob(os.path.join(directory, '*.htm'))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+def main(argv):
+    repeat = 3
+    if '--repeat' in argv:
+        index = argv.index('--repeat')
+        repeat = int(argv[index + 1])
+        argv = argv[:index] + argv[index + 2:]
+    pages = load_corpus(argv[0]) if argv else synthetic_corpus()
+    if not pages:
+        print("No .html files found")
+        return 1
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB, {repeat} runs each\n")
+
+    reference = {name: html_extract.extract_bs4(html, name) for name, html in pages}
+    print(f"{'backend':<12} {'ms/page':>9} {'speedup':>8} {'identical':>10}")
+    baseline = None
+    for backend, extract in html_extract.EXTRACTORS.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs = {name: extract(html, name) for name, html in pages}
+        elapsed = (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+        baseline = baseline or elapsed
+        identical = sum(outputs[name] == reference[name] for name, _ in pages)
+        print(f"{backend:<12} {elapsed:>9.2f} {baseline / elapsed:>7.1f}x {identical:>5}/{len(pages)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+# Benchmark cold-start import time of the app.
+#
+#   python bench_startup.py [module] [--repeat N] [--top N] [--max-ms MS]
+#
+# Imports module (default: app) in a fresh interpreter under
+# "python -X importtime" N times and reports the median total import time,
+# the modules it imports directly that take the longest, and where the
+# optional dependencies loaded lazily on first use (TTS, web search, HTML
+# parsing) stand. With --max-ms, exits non-zero when the median is slower,
+# so a deploy pipeline can catch startup regressions.
+import os
+import re
+import sys
+import statistics
+import subprocess
+import tempfile
+
+# Dependencies that should only be imported on first use
+LAZY_MODULES = ['pyttsx3', 'duckduckgo_search', 'bs4', 'lxml', 'selectolax', 'tiktoken']
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$')
+
+# [(depth, module, self_us, cumulative_us)] from one -X importtime run
+def import_times(module, env):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            rows.append((depth, match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+def main(argv):
+    options = {'--repeat': 5, '--top': 10, '--max-ms': None}
+    args = []
+    while argv:
+        arg = argv.pop(0)
+        if arg in options:
+            options[arg] = float(argv.pop(0))
+        else:
+            args.append(arg)
+    module = args[0] if args else 'app'
+
+    # Keep the benchmark's databases out of the working tree
+    scratch = tempfile.mkdtemp(prefix='bench_startup_')
+    env = dict(os.environ)
+    env.setdefault('CHAT_DB_PATH', os.path.join(scratch, 'chat_history.db'))
+    env.setdefault('CACHE_DB_PATH', os.path.join(scratch, 'cache.db'))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get('PYTHONPATH')]))
+
+    runs = [import_times(module, env) for _ in range(int(options['--repeat']))]
+    totals = [next(cumulative for depth, name, _, cumulative in rows if depth == 0 and name == module) for rows in runs]
+    median = statistics.median(totals) / 1000
+    print(f"import {module}: median {median:.0f} ms, min {min(totals) / 1000:.0f} ms, "
+          f"max {max(totals) / 1000:.0f} ms over {len(runs)} runs\n")
+
+    # Direct imports of the module, from the run with the median total
+    rows = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    direct = sorted((row for row in rows if row[0] == 1), key=lambda row: -row[3])
+    print(f"{'module':<28} {'cumulative ms':>14}")
+    for _, name, _, cumulative in direct[:int(options['--top'])]:
+        print(f"{name:<28} {cumulative / 1000:>14.1f}")
+
+    loaded = {name: cumulative for _, name, _, cumulative in rows}
+    print(f"\n{'lazy dependency':<28} {'at startup':>14}")
+    for name in LAZY_MODULES:
+        status = f"{loaded[name] / 1000:.1f} ms" if name in loaded else "not loaded"
+        print(f"{name:<28} {status:>14}")
+
+    if options['--max-ms'] is not None and median > options['--max-ms']:
+        print(f"\nStartup regression: {median:.0f} ms > {options['--max-ms']:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,222 @@
+import os
+import json
+import asyncio
+import time
+import threading
+from collections import OrderedDict
+import db
+from db_writer import WriteBehindQueue
+
+# Caches live in their own database so they can be deleted without touching chat history
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", "cache.db")
+
+# Returned by get() on a miss, since None can be a legitimately cached value
+MISS = object()
+
+# In-memory LRU with a per-entry TTL (seconds; None means no expiry)
+class LRUCache:
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+CACHE_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+'''
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+def init_cache_db(path=None):
+    path = path or CACHE_DB_PATH
+    with _init_lock:
+        if path in _initialized_paths:
+            return
+        with db.transaction(path) as conn:
+            conn.execute(CACHE_TABLE_SQL)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (namespace, accessed_at)")
+        _initialized_paths.add(path)
+
+# SQLite-backed tier shared by every cache namespace. Values are stored as JSON.
+# Writes go through a write-behind queue so set() never waits on the disk.
+class SQLiteCache:
+    def __init__(self, namespace, max_entries=10000, ttl=None, path=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path or CACHE_DB_PATH
+        init_cache_db(self.path)
+        self._writer = WriteBehindQueue(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            name=f"cache-writer-{namespace}",
+            path=self.path
+        )
+        self._sets_since_prune = 0
+        self._prune_lock = threading.Lock()
+
+    def get(self, key):
+        row = db.query_one(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+            path=self.path
+        )
+        if row is None:
+            return MISS
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return MISS
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        self._writer.put((self.namespace, key, json.dumps(value), expires_at, now))
+        # Evict in the background every so often instead of on every write
+        self._sets_since_prune += 1
+        if self._sets_since_prune >= max(self.max_entries // 10, 1):
+            self._sets_since_prune = 0
+            threading.Thread(target=self.prune, args=(False,), daemon=True).start()
+
+    def delete(self, key):
+        self._writer.flush()
+        with db.transaction(self.path) as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    # Drop expired entries, then the least recently written ones beyond max_entries.
+    # Background prunes pass blocking=False and skip if another prune is running.
+    def prune(self, blocking=True):
+        if not self._prune_lock.acquire(blocking=blocking):
+            return
+        try:
+            self._writer.flush()
+            with db.transaction(self.path) as conn:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                    (self.namespace, time.time())
+                )
+                conn.execute(
+                    """DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                        SELECT key FROM cache_entries WHERE namespace = ?
+                        ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.namespace, self.namespace, self.max_entries)
+                )
+        except Exception as e:
+            print(f"Warning: Could not prune cache {self.namespace}: {str(e)}")
+        finally:
+            self._prune_lock.release()
+
+    def flush(self):
+        self._writer.flush()
+
+# Memory LRU in front of the SQLite tier, with hit/miss counters. The SQLite
+# tier (the cache database and its writer thread) is created on first use, so
+# modules can declare caches at import time for free.
+class TieredCache:
+    def __init__(self, namespace, max_memory_entries=1024, max_disk_entries=10000, ttl=None, path=None):
+        self.namespace = namespace
+        self.memory = LRUCache(max_memory_entries, ttl)
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.path = path
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def disk(self):
+        if self._disk is None and self.max_disk_entries:
+            with self._disk_lock:
+                if self._disk is None:
+                    self._disk = SQLiteCache(self.namespace, self.max_disk_entries, self.ttl, self.path)
+        return self._disk
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not MISS:
+            self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except Exception as e:
+                print(f"Warning: Cache read failed for {self.namespace}: {str(e)}")
+                value = MISS
+            if value is not MISS:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.misses += 1
+        return MISS
+
+    # get() for coroutines: a memory hit returns right away, while the disk read
+    # (and opening the cache database on first use) runs in a worker thread
+    async def async_get(self, key):
+        value = self.memory.get(key)
+        if value is not MISS:
+            self.memory_hits += 1
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key, value, ttl=None):
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
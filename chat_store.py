@@ -0,0 +1,132 @@
+import os
+import time
+import uuid
+import hashlib
+import db
+from db_writer import WriteBehindQueue
+
+# Saved chats. A session is one chat in the UI by one user with one model and
+# system prompt (logging in or changing either mid-chat starts a new session); it holds the turns as
+# user/assistant message pairs. System prompts are stored once and referenced
+# by hash, and times are Unix seconds.
+SYSTEM_PROMPTS_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS system_prompts (
+    hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+) WITHOUT ROWID
+'''
+
+SESSIONS_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    session_key TEXT NOT NULL,
+    username TEXT NOT NULL,
+    model TEXT,
+    system_prompt_hash TEXT NOT NULL REFERENCES system_prompts (hash),
+    created_at INTEGER NOT NULL,
+    UNIQUE (session_key, username, model, system_prompt_hash)
+)
+'''
+
+MESSAGES_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    username TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    UNIQUE (session_id, turn, role)
+)
+'''
+
+INSERT_MESSAGE_SQL = "INSERT INTO messages (session_id, username, turn, role, content, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+
+# Create the chat tables inside an open transaction; warns if turns saved in
+# the old flat conversations table are still waiting to be migrated
+def init_chat_tables(conn, check_legacy=True):
+    conn.execute(SYSTEM_PROMPTS_TABLE_SQL)
+    conn.execute(SESSIONS_TABLE_SQL)
+    conn.execute(MESSAGES_TABLE_SQL)
+    # A user's sessions are found by username and a session's messages by
+    # (session_id, turn). Messages repeat the username so a user's turns can be
+    # paged in id order straight from this index.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_username_id ON sessions (username, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_user_turns ON messages (username, id) WHERE role = 'user'")
+    if not check_legacy:
+        return
+    legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations'").fetchone()
+    if legacy and conn.execute("SELECT 1 FROM conversations LIMIT 1").fetchone():
+        print("Warning: The database still has turns in the old conversations table; run python migrate_db.py to move them")
+
+def prompt_hash(system_prompt):
+    return hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest()
+
+def new_session_key():
+    return uuid.uuid4().hex
+
+# ID of the user's session for session_key with this model and system prompt,
+# created if needed
+def get_session_id(conn, session_key, username, model, system_prompt, created_at):
+    digest = prompt_hash(system_prompt)
+    conn.execute("INSERT OR IGNORE INTO system_prompts (hash, content) VALUES (?, ?)", (digest, system_prompt or ""))
+    conn.execute(
+        "INSERT OR IGNORE INTO sessions (session_key, username, model, system_prompt_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+        (session_key, username or "", model, digest, created_at)
+    )
+    return conn.execute(
+        "SELECT id FROM sessions WHERE session_key = ? AND username = ? AND model IS ? AND system_prompt_hash = ?",
+        (session_key, username or "", model, digest)
+    ).fetchone()[0]
+
+# Append one turn to a user's session
+def insert_turn(conn, session_id, username, user_message, assistant_message, created_at):
+    turn = conn.execute("SELECT COALESCE(MAX(turn) + 1, 0) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+    conn.executemany(INSERT_MESSAGE_SQL, [
+        (session_id, username or "", turn, "user", user_message, created_at),
+        (session_id, username or "", turn, "assistant", assistant_message, created_at),
+    ])
+
+# Queued turns are (session_key, username, model, system_prompt, user_message,
+# assistant_message, created_at)
+class ChatWriter(WriteBehindQueue):
+    def insert(self, conn, rows):
+        for session_key, username, model, system_prompt, user_message, assistant_message, created_at in rows:
+            session_id = get_session_id(conn, session_key, username, model, system_prompt, created_at)
+            insert_turn(conn, session_id, username, user_message, assistant_message, created_at)
+
+# Turns are written behind the chat in batched transactions
+chat_writer = ChatWriter(
+    None,
+    max_queue=int(os.environ.get("CHAT_DB_MAX_QUEUE", 10000)),
+    batch_size=int(os.environ.get("CHAT_DB_BATCH_SIZE", 200)),
+    flush_interval=float(os.environ.get("CHAT_DB_FLUSH_INTERVAL", 0.5)),
+    name="chat-writer"
+)
+
+# Save a turn (queued; returns without waiting for the disk). Turns with the same
+# session_key belong to one chat; without one the turn gets a session of its own.
+def save_turn(session_key, user_message, assistant_message, model, system_prompt, username=""):
+    chat_writer.put((session_key or new_session_key(), username, model, system_prompt,
+                     user_message, assistant_message, int(time.time())))
+
+PAGE_SQL = '''
+SELECT u.id, u.content, a.content
+FROM messages u
+JOIN messages a ON a.session_id = u.session_id AND a.turn = u.turn AND a.role = 'assistant'
+WHERE u.username = ? AND u.role = 'user' {condition}
+ORDER BY u.id {order}
+LIMIT ?
+'''
+
+# Keyset pagination over a user's saved turns. Rows come back newest first as
+# (id, user_message, assistant_message): the latest page by default, turns older
+# than before_id, or up to limit turns newer than after_id.
+def get_conversations_page(username, before_id=None, after_id=None, limit=20):
+    if after_id is not None:
+        rows = db.query_all(PAGE_SQL.format(condition="AND u.id > ?", order="ASC"), (username, after_id, limit))
+        return rows[::-1]
+    if before_id is not None:
+        return db.query_all(PAGE_SQL.format(condition="AND u.id < ?", order="DESC"), (username, before_id, limit))
+    return db.query_all(PAGE_SQL.format(condition="", order="DESC"), (username, limit))
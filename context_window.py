@@ -0,0 +1,265 @@
+import os
+import json
+import hashlib
+import threading
+import model_catalog
+from cache import TieredCache, MISS
+
+# Chat history is trimmed to fit the model's context window: the system prompt
+# and the current message are always sent, then as many of the most recent
+# turns as fit. CONTEXT_BUDGET_TOKENS caps the prompt further (0 = no cap).
+CONTEXT_BUDGET_TOKENS = int(os.environ.get("CONTEXT_BUDGET_TOKENS", 0))
+
+# Tokens kept free for the reply
+CONTEXT_RESPONSE_RESERVE = int(os.environ.get("CONTEXT_RESPONSE_RESERVE", 2048))
+
+# Context length assumed for models missing from the /models catalog, e.g.
+# before the catalog has been fetched. Current chat models take at least 32k
+# tokens; a smaller guess would cut history the model could have used.
+CONTEXT_DEFAULT_LENGTH = int(os.environ.get("CONTEXT_DEFAULT_LENGTH", 32768))
+
+# Summarize turns that no longer fit instead of dropping them silently
+CONTEXT_SUMMARIZE = os.environ.get("CONTEXT_SUMMARIZE", "").lower() in ("1", "true", "yes")
+
+# Room set aside for the summary when turns are being dropped
+SUMMARY_MAX_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_TOKENS", 512))
+
+# Per-message framing (role, separators) added by chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Summaries by hash of the turns they cover, so each older turn is summarized once
+summary_cache = TieredCache("summaries", max_memory_entries=256, max_disk_entries=5000)
+
+_encoding_lock = threading.Lock()
+_warm_lock = threading.Lock()
+_encoding = None
+_encoding_loaded = False
+_encoding_loading = False
+
+# tiktoken's cl100k_base is a close enough count for most OpenRouter models.
+# Its first load downloads the vocabulary, so it is loaded on a background
+# thread (warm_encoding) and never on the event loop. Until it is ready, and
+# without tiktoken or if the download fails, counts are estimated at about
+# four characters per token.
+def get_encoding():
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"Warning: tiktoken unavailable, estimating token counts: {str(e)}")
+            _encoding_loaded = True
+        return _encoding
+
+# Start loading the encoding in the background (once). Uses its own lock so a
+# caller never waits on the thread holding _encoding_lock during the download.
+def warm_encoding():
+    global _encoding_loading
+    with _warm_lock:
+        if _encoding_loading or _encoding_loaded:
+            return
+        _encoding_loading = True
+    threading.Thread(target=get_encoding, name="tiktoken-load", daemon=True).start()
+
+def count_tokens(text):
+    if not text:
+        return 0
+    if not _encoding_loaded:
+        warm_encoding()
+    encoding = _encoding if _encoding_loaded else None
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def message_tokens(message):
+    return count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+# Prompt token budget for a model: its context length from the catalog, minus
+# the reply reserve, capped by CONTEXT_BUDGET_TOKENS. A model missing from the
+# catalog starts a catalog fetch when base_url is OpenRouter.
+def token_budget(model, base_url=None):
+    info = model_catalog.get_model_info(model)
+    if info is None and model_catalog.is_openrouter(base_url):
+        # Fetch the catalog for next time; OpenRouter's /models needs no API key
+        model_catalog.refresh_in_background(None, base_url)
+    context_length = (info or {}).get("context_length") or CONTEXT_DEFAULT_LENGTH
+    budget = context_length - CONTEXT_RESPONSE_RESERVE
+    if CONTEXT_BUDGET_TOKENS:
+        budget = min(budget, CONTEXT_BUDGET_TOKENS)
+    return max(budget, 0)
+
+def turn_messages(turn):
+    human, assistant = turn
+    return [{"role": "user", "content": human}, {"role": "assistant", "content": assistant}]
+
+# Running hash over the turns so far, so a summary of the first n turns can be
+# found again when more turns fall out of the window later
+def turn_digest(previous_digest, turn):
+    return hashlib.sha256((previous_digest + json.dumps(list(turn), ensure_ascii=False)).encode("utf-8")).hexdigest()
+
+def summary_key(model, digest):
+    return f"{model}:{digest}"
+
+# Message list for a request, carrying its JSON so the payload can be built
+# without serializing the history again
+class MessageList(list):
+    serialized = None
+
+# Copy of messages with some entries replaced ({index: message}). For a
+# MessageList only the replaced entries are serialized again; the JSON between
+# them is reused, so replacing a few messages near either end stays cheap.
+def replace_messages(messages, replacements):
+    replaced = MessageList(messages)
+    for index, message in replacements.items():
+        replaced[index] = message
+    serialized = getattr(messages, "serialized", None)
+    if serialized is None:
+        return replaced
+    count = len(messages)
+    head_end = max([index + 1 for index in replacements if index < count - index] or [0])
+    tail_start = min([index for index in replacements if index >= count - index] or [count])
+    if head_end > tail_start:
+        replaced.serialized = json.dumps(list(replaced))
+        return replaced
+    old_head = "[" + ", ".join(json.dumps(message) for message in messages[:head_end])
+    old_tail = ", ".join(json.dumps(message) for message in messages[tail_start:]) + "]"
+    middle = serialized[len(old_head):len(serialized) - len(old_tail)]
+    replaced.serialized = ("[" + ", ".join(json.dumps(message) for message in replaced[:head_end]) + middle
+                           + ", ".join(json.dumps(message) for message in replaced[tail_start:]) + "]")
+    return replaced
+
+# Per-session view of the chat history, kept in a gr.State. Each turn is
+# serialized, token-counted and hashed once when it is added, and the JSON of
+# the window of recent turns is extended or trimmed in place, so building a
+# request does not get slower as the session grows.
+class Conversation:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Identifies the chat's session in the history database; assigned when
+        # the first turn is saved, and cleared with the chat
+        self.session_key = None
+        self.turns = []
+        self.messages = []
+        self.fragments = []
+        self.tokens = []
+        self.digests = []
+        # Turns from start on are in the window; window is their JSON joined with ", "
+        self.start = 0
+        self.window = ""
+        self.window_tokens = 0
+
+    def append(self, turn):
+        turn = tuple(turn)
+        messages = turn_messages(turn)
+        fragment = ", ".join(json.dumps(message) for message in messages)
+        cost = sum(message_tokens(message) for message in messages)
+        self.turns.append(turn)
+        self.messages.extend(messages)
+        self.fragments.append(fragment)
+        self.tokens.append(cost)
+        self.digests.append(turn_digest(self.digests[-1] if self.digests else "", turn))
+        self.window = self.window + ", " + fragment if self.window else fragment
+        self.window_tokens += cost
+
+    # Catch up with the chatbot history: add the new turns, or start over if
+    # the history was cleared or replaced
+    def sync(self, history):
+        known = len(self.turns)
+        if len(history) < known or (known and tuple(history[known - 1]) != self.turns[-1]):
+            self.reset()
+            known = 0
+        for turn in history[known:]:
+            self.append(turn)
+
+    # Move the window to the longest run of latest turns that fits in budget
+    # tokens; returns the number of older turns left out
+    def fit(self, budget):
+        start, tokens = self.start, self.window_tokens
+        while start < len(self.turns) and tokens > budget:
+            tokens -= self.tokens[start]
+            start += 1
+        while start > 0 and tokens + self.tokens[start - 1] <= budget:
+            start -= 1
+            tokens += self.tokens[start]
+        if start > self.start:
+            cut = sum(len(fragment) + 2 for fragment in self.fragments[self.start:start])
+            self.window = self.window[cut:]
+        elif start < self.start:
+            self.window = ", ".join(self.fragments[start:])
+        self.start, self.window_tokens = start, tokens
+        return start
+
+    def window_messages(self):
+        return self.messages[2 * self.start:]
+
+def summary_request(previous_summary, turns):
+    transcript = "\n\n".join(f"User: {human}\nAssistant: {assistant}" for human, assistant in turns)
+    if previous_summary:
+        transcript = f"Summary so far:\n{previous_summary}\n\nNew turns:\n{transcript}"
+    return [
+        {"role": "system", "content": (
+            "Summarize this conversation so it can replace the original turns as context. "
+            "Keep names, facts, decisions, open questions and user preferences. "
+            f"Use at most {SUMMARY_MAX_TOKENS * 3 // 4} words."
+        )},
+        {"role": "user", "content": transcript},
+    ]
+
+# Summary of the first count turns of the conversation. The longest
+# already-summarized prefix is reused and only the turns after it are sent, so
+# each turn is summarized once. summarize(messages) is an awaitable completion.
+# Returns None if nothing could be summarized.
+async def summarize_turns(model, conversation, count, summarize):
+    previous, covered = None, 0
+    for index in range(count - 1, -1, -1):
+        cached = await summary_cache.async_get(summary_key(model, conversation.digests[index]))
+        if cached is not MISS:
+            previous, covered = cached, index + 1
+            break
+    if covered == count:
+        return previous
+    try:
+        summary = await summarize(summary_request(previous, conversation.turns[covered:count]))
+    except Exception as e:
+        print(f"Warning: Could not summarize conversation: {str(e)}")
+        return previous
+    if not summary or summary.startswith("Error"):
+        print(f"Warning: Could not summarize conversation: {summary}")
+        return previous
+    summary_cache.set(summary_key(model, conversation.digests[count - 1]), summary)
+    return summary
+
+# Build the messages for a request: system prompt, optional summary of older
+# turns, the recent turns that fit the model's budget, then the new message.
+# Pass the session's Conversation to reuse the work done on earlier turns.
+async def build_messages(model, system_prompt, history, current_message, summarize=None, conversation=None, base_url=None):
+    head = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    current = {"role": "user", "content": current_message}
+    budget = token_budget(model, base_url) - sum(message_tokens(message) for message in head) - message_tokens(current)
+
+    if conversation is None:
+        conversation = Conversation()
+    conversation.sync(history)
+    dropped = conversation.fit(budget)
+    summary = None
+    if dropped and CONTEXT_SUMMARIZE and summarize is not None:
+        # Make room for the summary, then summarize everything that fell out
+        dropped = conversation.fit(budget - SUMMARY_MAX_TOKENS)
+        summary = await summarize_turns(model, conversation, dropped, summarize)
+    if dropped:
+        print(f"Context: dropped {dropped} older turns to fit {model}'s budget"
+              + (" (summarized)" if summary else ""))
+
+    if summary:
+        head.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    messages = MessageList(head + conversation.window_messages() + [current])
+    parts = [json.dumps(message) for message in head]
+    if conversation.window:
+        parts.append(conversation.window)
+    parts.append(json.dumps(current))
+    messages.serialized = "[" + ", ".join(parts) + "]"
+    return messages
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Chat history database; override the location with CHAT_DB_PATH
+DB_PATH = os.environ.get("CHAT_DB_PATH", "chat_history.db")
+
+# Seconds a writer waits on a locked database before raising "database is locked"
+BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", 10))
+
+# Page cache per connection in KiB (negative cache_size means KiB in SQLite)
+CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 16384))
+
+# Compiled statements kept per connection; the same SQL text reuses its prepared statement
+STATEMENT_CACHE_SIZE = 256
+
+# One long-lived connection per thread. sqlite3 connections must not be shared
+# across threads, and Gradio/asyncio worker threads are reused between requests.
+_local = threading.local()
+
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE)
+    # WAL lets readers run alongside a writer and only fsyncs at checkpoints;
+    # synchronous=NORMAL is durable against app crashes in WAL mode
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+# Connection for the calling thread, opened on first use. Other database files
+# (e.g. the cache database) get their own per-thread connection by path.
+def get_connection(path=None):
+    path = path or DB_PATH
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = connect(path)
+    return conn
+
+# Close this thread's connection to path, or all of its connections
+def close_connection(path=None):
+    conns = getattr(_local, "conns", {})
+    for conn_path in ([path] if path else list(conns)):
+        conn = conns.pop(conn_path, None)
+        if conn is not None:
+            conn.close()
+
+# Run statements in one transaction: commits on success, rolls back on error
+@contextmanager
+def transaction(path=None):
+    conn = get_connection(path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def query_all(sql, params=(), path=None):
+    return get_connection(path).execute(sql, params).fetchall()
+
+def query_one(sql, params=(), path=None):
+    return get_connection(path).execute(sql, params).fetchone()
@@ -0,0 +1,159 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import db
+
+# Marker items understood by the writer thread
+_FLUSH = object()
+_STOP = object()
+
+# Write-behind queue: callers enqueue rows and return immediately, a background
+# thread inserts them in batched transactions once batch_size rows are waiting
+# or flush_interval seconds have passed since the first row of the batch.
+# When the queue is full, rows go to a single overflow thread instead, so put()
+# never runs a transaction on the caller's thread (often the event loop).
+class WriteBehindQueue:
+    def __init__(self, sql, max_queue=10000, batch_size=200, flush_interval=0.5, name="db-writer", path=None):
+        self.sql = sql
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0
+        self.rows_overflowed = 0
+        # Seconds the oldest row of the last batch waited in the queue
+        self.last_lag = 0.0
+        self.name = name
+        self._overflow = None
+        self._overflow_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, row):
+        if self._closed:
+            self._write([row])
+            return
+        try:
+            self._queue.put_nowait((time.monotonic(), row))
+        except queue.Full:
+            # The writer is behind; hand the row to the overflow thread
+            self.rows_overflowed += 1
+            self._overflow_executor().submit(self._write, [row])
+
+    def _overflow_executor(self):
+        with self._overflow_lock:
+            if self._overflow is None:
+                self._overflow = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-overflow")
+            return self._overflow
+
+    # Block until every row queued so far has been written
+    def flush(self):
+        if self._closed:
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+        if self._overflow is not None:
+            # One worker runs jobs in order, so this waits for earlier overflow writes
+            self._overflow.submit(lambda: None).result()
+
+    # Flush remaining rows and stop the writer thread (also runs at interpreter exit)
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._overflow is not None:
+            self._overflow.submit(db.close_connection)
+            self._overflow.shutdown(wait=True)
+        # Rows that raced with close() land after the stop marker; write them here
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FLUSH and item is not _STOP:
+                leftover.append(item[1])
+            self._queue.task_done()
+        if leftover:
+            self._write(leftover)
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "rows_dropped": self.rows_dropped,
+            "rows_overflowed": self.rows_overflowed,
+            "lag_ms": int(self.last_lag * 1000),
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            oldest = None
+            taken = 0
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                elif item is not _FLUSH:
+                    queued_at, row = item
+                    oldest = queued_at if oldest is None else oldest
+                    batch.append(row)
+                # A flush request or a stop writes whatever has been collected right away
+                if item is _STOP or item is _FLUSH or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+                self.last_lag = time.monotonic() - oldest
+            for _ in range(taken):
+                self._queue.task_done()
+        db.close_connection()
+
+    # Insert one batch inside an open transaction; subclasses can override this
+    # for rows that need more than one statement
+    def insert(self, conn, rows):
+        conn.executemany(self.sql, rows)
+
+    def _write(self, rows):
+        try:
+            with db.transaction(self.path) as conn:
+                self.insert(conn, rows)
+            self.rows_written += len(rows)
+            self.batches_written += 1
+        except Exception as e:
+            self.rows_dropped += len(rows)
+            print(f"Warning: Could not save {len(rows)} rows to database: {str(e)}")
+
+# Markdown table of the stats of each named writer
+def format_writer_stats(writers):
+    lines = [
+        "| Writer | Queued | Written | Overflowed | Dropped | Lag |",
+        "|---|---|---|---|---|---|",
+    ]
+    for name, writer in writers.items():
+        stats = writer.stats()
+        lines.append(f"| {name} | {stats['queue_depth']} | {stats['rows_written']} | {stats['rows_overflowed']} | "
+                     f"{stats['rows_dropped']} | {stats['lag_ms']} ms |")
+    return "\n".join(lines)
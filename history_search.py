@@ -0,0 +1,122 @@
+import sqlite3
+from datetime import datetime
+import db
+
+# Full-text index over saved messages. It is an external-content FTS5 table,
+# so the text is stored once in messages and triggers keep the index in sync.
+# username is indexed too, which lets a search touch only that user's postings.
+FTS_TABLE_SQL = '''
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    content,
+    username,
+    content='messages',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+'''
+
+FTS_TRIGGERS_SQL = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, content, username)
+        VALUES (new.id, new.content, new.username);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, username)
+        VALUES ('delete', old.id, old.content, old.username);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, username)
+        VALUES ('delete', old.id, old.content, old.username);
+        INSERT INTO messages_fts (rowid, content, username)
+        VALUES (new.id, new.content, new.username);
+    END
+    ''',
+]
+
+# Markers placed around matched terms in snippets (rendered as bold Markdown)
+HIGHLIGHT_START = "**"
+HIGHLIGHT_END = "**"
+
+SEARCH_SQL = f'''
+SELECT m.id, m.created_at, m.role,
+       snippet(messages_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 16)
+FROM messages_fts
+JOIN messages m ON m.id = messages_fts.rowid
+WHERE messages_fts MATCH ? AND m.username = ?
+ORDER BY bm25(messages_fts, 1.0, 0.0)
+LIMIT ?
+'''
+
+# Fallback when the SQLite build lacks FTS5: unranked substring scan
+LIKE_SEARCH_SQL = '''
+SELECT m.id, m.created_at, m.role, substr(m.content, 1, 200)
+FROM messages m
+WHERE m.username = ? AND m.content LIKE ? ESCAPE '\\'
+ORDER BY m.id DESC
+LIMIT ?
+'''
+
+# Create the index and its triggers inside an open transaction; returns False if
+# this SQLite build has no FTS5 support
+def init_search_index(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+    ).fetchone()
+    if not exists:
+        try:
+            conn.execute(FTS_TABLE_SQL)
+        except sqlite3.OperationalError as e:
+            print(f"Warning: Full-text search unavailable: {str(e)}")
+            return False
+        # Index messages saved before the index existed
+        conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+    for trigger_sql in FTS_TRIGGERS_SQL:
+        conn.execute(trigger_sql)
+    return True
+
+def fts_available():
+    return db.query_one(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+    ) is not None
+
+def quote_fts(term):
+    return '"' + term.replace('"', '""') + '"'
+
+# Turn free text into a safe FTS5 query: every word must match, and the last
+# word also matches as a prefix so results show up while typing
+def build_fts_query(text, username):
+    terms = text.split()
+    if not terms:
+        return None
+    words = [quote_fts(term) for term in terms]
+    words[-1] += '*'
+    query = f"content : ({' '.join(words)})"
+    if username.strip():
+        query = f"username : {quote_fts(username)} AND {query}"
+    return query
+
+# Ranked matching messages of one user as (id, created_at, role, snippet)
+def search_conversations(username, text, limit=20):
+    if not fts_available():
+        pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return db.query_all(LIKE_SEARCH_SQL, (username, pattern, limit))
+    query = build_fts_query(text, username)
+    if query is None:
+        return []
+    return db.query_all(SEARCH_SQL, (query, username, limit))
+
+ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+
+def format_search_results(rows):
+    if not rows:
+        return "No matching conversations."
+    formatted = []
+    for _, created_at, role, snippet in rows:
+        when = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
+        formatted.append(f"*{when}*\n\n**{ROLE_LABELS.get(role, role)}:** {snippet}\n\n---")
+    return '\n\n'.join(formatted)
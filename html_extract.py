@@ -0,0 +1,272 @@
+import os
+import re
+import importlib.util
+from html.parser import HTMLParser
+
+# Optional faster parsers; extraction falls back to the pure-Python html.parser.
+# Only checked for here: parser modules (and bs4) are imported on first use, so
+# they don't slow down app startup.
+LXML_AVAILABLE = importlib.util.find_spec('lxml') is not None
+SELECTOLAX_AVAILABLE = importlib.util.find_spec('selectolax') is not None
+
+# Extractor used by extract_webpage_text: auto, selectolax, lxml, html.parser or stream
+HTML_EXTRACTOR = os.environ.get("HTML_EXTRACTOR", "auto")
+
+# Length budget for the text handed to the model
+MAX_CHARS = 8000
+
+# Common content containers, in order of preference
+CONTENT_SELECTORS = ['main', 'article', 'div.content', 'div.main-content', '#content', '#main']
+
+# A container must hold this much text to be used instead of the whole page
+MIN_CONTENT_CHARS = 200
+
+REMOVED_TAGS = ["script", "style", "nav", "header", "footer", "aside", "iframe", "noscript",
+                "meta", "button", "svg", "form", "input", "textarea"]
+
+# bs4's get_text leaves out the text of these elements, so it counts toward
+# neither a container's length nor the page text
+NON_TEXT_TAGS = ['script', 'style', 'template']
+
+# lexbor moves the text of a <noscript> in <head> out of the element, where it
+# would survive the removal of noscript tags
+HEAD_NOSCRIPT_RE = re.compile(r'<noscript\b.*?</noscript\s*>', re.IGNORECASE | re.DOTALL)
+BODY_START_RE = re.compile(r'<body\b', re.IGNORECASE)
+
+REMOVED_CLASSES = ['ad', 'ads', 'advertisement', 'sidebar', 'nav', 'menu', 'comment', 'footer', 'header']
+REMOVED_CLASS_SELECTOR = ', '.join('.' + name for name in REMOVED_CLASSES)
+
+# Collapse raw page text into one phrase per line
+def clean_text(text):
+    lines = (line.strip() for line in text.splitlines())
+    # Break multi-headlines into a line each
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    # Remove blank lines and join with newlines
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+    # Remove excessive newlines (more than 2 in a row)
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+# Format the output with title and URL, limited to avoid token limits
+def format_page(title, text, url):
+    formatted_text = f"Title: {(title or 'No title').strip()}\nURL: {url}\n\n{clean_text(text)}"
+    if len(formatted_text) > MAX_CHARS:
+        formatted_text = formatted_text[:MAX_CHARS] + "...\n[Content truncated due to length]"
+    return formatted_text
+
+def extract_bs4(html, url, parser='html.parser'):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, parser)
+
+    # Try to get the main content
+    main_content = None
+    for container in CONTENT_SELECTORS:
+        content = soup.select_one(container)
+        if content and len(content.get_text(strip=True)) > MIN_CONTENT_CHARS:  # Ensure it has substantial content
+            main_content = content
+            break
+
+    # If no main content container found, use the whole body
+    if not main_content:
+        main_content = soup
+
+    # Remove unwanted elements
+    for element in main_content(REMOVED_TAGS):
+        element.extract()
+
+    # Remove elements with common ad/nav/sidebar class names
+    for element in main_content.select(REMOVED_CLASS_SELECTOR):
+        element.extract()
+
+    title = soup.title.string if soup.title else None
+    return format_page(title, main_content.get_text(), url)
+
+# Same tree walk as html.parser, with lxml's C parser building the tree
+def extract_lxml(html, url):
+    return extract_bs4(html, url, 'lxml')
+
+# Length of the text bs4 would see in node, which leaves out scripts and styles
+def selectolax_text_length(node):
+    length = len(node.text(deep=True, separator='', strip=True))
+    for element in node.css('script, style'):
+        length -= len(element.text(deep=True, separator='', strip=True))
+    return length
+
+def extract_selectolax(html, url):
+    from selectolax.lexbor import LexborHTMLParser
+    body = BODY_START_RE.search(html)
+    head_end = body.start() if body else len(html)
+    tree = LexborHTMLParser(HEAD_NOSCRIPT_RE.sub('', html[:head_end]) + html[head_end:])
+
+    main_content = None
+    for container in CONTENT_SELECTORS:
+        content = tree.css_first(container)
+        if content and selectolax_text_length(content) > MIN_CONTENT_CHARS:
+            main_content = content
+            break
+    if main_content is None:
+        main_content = tree.root
+
+    title_node = tree.css_first('title')
+    title = title_node.text() if title_node else None
+
+    if main_content is not None:
+        for element in main_content.css(', '.join(REMOVED_TAGS)):
+            element.decompose()
+        # Class names are matched case-sensitively, as bs4 does; lexbor's own
+        # class selectors ignore case in quirks-mode documents
+        for element in main_content.css('[class]'):
+            if any(name in REMOVED_CLASSES for name in (element.attributes.get('class') or '').split()):
+                element.decompose()
+    text = main_content.text(deep=True, separator='') if main_content is not None else ''
+    return format_page(title, text, url)
+
+# Elements that never have an end tag
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+
+def selector_matches(selector, tag, attrs):
+    if selector.startswith('#'):
+        return attrs.get('id') == selector[1:]
+    name, _, class_name = selector.partition('.')
+    if name != tag:
+        return False
+    return not class_name or class_name in (attrs.get('class') or '').split()
+
+class StopExtraction(Exception):
+    pass
+
+# Single pass over the markup with no tree: text inside removed elements is
+# skipped as it streams by, the first element matching each content selector
+# collects its own text, and parsing stops as soon as the outcome is settled
+# (a qualifying <main> has closed, or every live buffer is past the budget).
+class StreamingExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.skip_depth = 0
+        self.title = None
+        self.in_title = False
+        self.title_markup = False
+        self.non_text_depth = 0
+        self.page_parts = []
+        self.page_chars = 0
+        # selector -> {'parts', 'chars', 'raw_chars', 'open', 'closed'}
+        self.candidates = {}
+
+    def _full(self, chars):
+        # Whitespace collapses during cleaning, so keep a margin past the budget
+        return chars > MAX_CHARS * 2
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self.in_title:
+            self.title_markup = True
+        if tag == 'title' and self.title is None:
+            self.in_title = True
+        skip = tag in REMOVED_TAGS or any(name in REMOVED_CLASSES for name in (attrs.get('class') or '').split())
+        opened = []
+        for selector in CONTENT_SELECTORS:
+            if selector not in self.candidates and selector_matches(selector, tag, attrs):
+                self.candidates[selector] = {'parts': [], 'chars': 0, 'raw_chars': 0, 'open': True, 'closed': False}
+                opened.append(selector)
+        if tag in VOID_TAGS:
+            for selector in opened:
+                self.candidates[selector].update(open=False, closed=True)
+            return
+        self.stack.append((tag, skip, opened))
+        if skip:
+            self.skip_depth += 1
+        if tag in NON_TEXT_TAGS:
+            self.non_text_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self.in_title = False
+        # Close up to the matching open tag, tolerating unclosed children
+        if not any(open_tag == tag for open_tag, _, _ in self.stack):
+            return
+        while self.stack:
+            open_tag, skip, opened = self.stack.pop()
+            if skip:
+                self.skip_depth -= 1
+            if open_tag in NON_TEXT_TAGS:
+                self.non_text_depth -= 1
+            for selector in opened:
+                self.candidates[selector].update(open=False, closed=True)
+            if open_tag == tag:
+                break
+        self._check_done()
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title = (self.title or '') + data
+        if self.non_text_depth:
+            return
+        stripped = len(data.strip())
+        for candidate in self.candidates.values():
+            if candidate['open']:
+                candidate['raw_chars'] += stripped
+        if self.skip_depth:
+            return
+        if not self._full(self.page_chars):
+            self.page_parts.append(data)
+            self.page_chars += stripped
+        for candidate in self.candidates.values():
+            if candidate['open'] and not self._full(candidate['chars']):
+                candidate['parts'].append(data)
+                candidate['chars'] += stripped
+
+    def _check_done(self):
+        main = self.candidates.get(CONTENT_SELECTORS[0])
+        if main and main['closed'] and main['raw_chars'] > MIN_CONTENT_CHARS:
+            raise StopExtraction()
+        live = [c for c in self.candidates.values() if not c['closed']]
+        if self._full(self.page_chars) and all(self._full(c['chars']) for c in live) and \
+                len(self.candidates) == len(CONTENT_SELECTORS):
+            raise StopExtraction()
+
+    def result(self):
+        for selector in CONTENT_SELECTORS:
+            candidate = self.candidates.get(selector)
+            if candidate and candidate['raw_chars'] > MIN_CONTENT_CHARS:
+                return ''.join(candidate['parts'])
+        return ''.join(self.page_parts)
+
+def extract_stream(html, url):
+    parser = StreamingExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except StopExtraction:
+        pass
+    # html.parser parses elements inside <title> too, and bs4 then gives the
+    # title no single string
+    title = None if parser.title_markup else parser.title
+    return format_page(title, parser.result(), url)
+
+EXTRACTORS = {'html.parser': extract_bs4, 'stream': extract_stream}
+if LXML_AVAILABLE:
+    EXTRACTORS['lxml'] = extract_lxml
+if SELECTOLAX_AVAILABLE:
+    EXTRACTORS['selectolax'] = extract_selectolax
+
+# Preference order for HTML_EXTRACTOR=auto
+AUTO_ORDER = ['selectolax', 'lxml', 'html.parser']
+
+def get_extractor(name=None):
+    name = name or HTML_EXTRACTOR
+    if name == 'auto':
+        name = next(candidate for candidate in AUTO_ORDER if candidate in EXTRACTORS)
+    if name not in EXTRACTORS:
+        print(f"Warning: HTML extractor '{name}' is not available, using html.parser")
+        name = 'html.parser'
+    return EXTRACTORS[name]
+
+# Extract the readable text of an HTML page, formatted with its title and URL
+def extract_webpage_text(html, url):
+    return get_extractor()(html, url)
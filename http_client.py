@@ -0,0 +1,107 @@
+import os
+import asyncio
+import threading
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP/2 for the async client needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Pool sizing: one pool per host (OpenRouter, Wikipedia, fetched pages...) with
+# up to POOL_MAXSIZE keep-alive connections each. Override through env vars.
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 16))
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 32))
+
+# Timeouts in seconds. LLM calls get a longer read timeout since a
+# non-streamed completion sends nothing until generation is done.
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+LLM_READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", 300))
+
+# The async client multiplexes many concurrent chats, so its pool is much larger
+ASYNC_MAX_CONNECTIONS = int(os.environ.get("HTTP_ASYNC_MAX_CONNECTIONS", 1000))
+ASYNC_MAX_KEEPALIVE = int(os.environ.get("HTTP_ASYNC_MAX_KEEPALIVE", 100))
+
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+ASYNC_DEFAULT_TIMEOUT = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+ASYNC_LLM_TIMEOUT = httpx.Timeout(LLM_READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+# httpx async clients are tied to the event loop they were first used on
+_async_clients = weakref.WeakKeyDictionary()
+
+# Build a session whose adapters keep connections alive and pooled per host
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # The session is shared by every user, so never carry cookies between requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+# Shared session used by all outbound calls, created on first use
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return get_session().request(method, url, timeout=timeout, **kwargs)
+
+def get(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return request("GET", url, timeout=timeout, **kwargs)
+
+# Close pooled connections (e.g. on shutdown); a new session is made on next use
+def close():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+# Build an async client with pooled keep-alive connections and HTTP/2 when h2 is installed
+def create_async_client(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive=ASYNC_MAX_KEEPALIVE):
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=ASYNC_DEFAULT_TIMEOUT,
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+# Shared async client for the running event loop, created on first use
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _async_clients[loop] = create_async_client()
+    return client
+
+async def async_get(url, timeout=ASYNC_DEFAULT_TIMEOUT, **kwargs):
+    return await get_async_client().get(url, timeout=timeout, **kwargs)
+
+async def async_post(url, timeout=ASYNC_DEFAULT_TIMEOUT, **kwargs):
+    return await get_async_client().post(url, timeout=timeout, **kwargs)
+
+# Streaming request context manager: async with async_stream("POST", url, ...) as response
+def async_stream(method, url, timeout=ASYNC_DEFAULT_TIMEOUT, **kwargs):
+    return get_async_client().stream(method, url, timeout=timeout, **kwargs)
+
+async def async_close():
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,92 @@
+# Move saved chats from the old flat conversations table (one row per turn,
+# text timestamps, the system prompt copied onto every row) to the sessions,
+# messages and system_prompts tables.
+#
+#   python migrate_db.py [path]
+#
+# path defaults to CHAT_DB_PATH (chat_history.db). Old rows carry no session,
+# so a user's consecutive turns with the same model and system prompt, less
+# than SESSION_GAP seconds apart, become one session. The migration runs in one
+# transaction, then drops the old table and its search index and vacuums the file.
+import os
+import sys
+import time
+import db
+import chat_store
+from history_search import init_search_index
+
+SESSION_GAP = 30 * 60
+
+LEGACY_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS conversations_fts_insert",
+    "DROP TRIGGER IF EXISTS conversations_fts_delete",
+    "DROP TRIGGER IF EXISTS conversations_fts_update",
+    "DROP TABLE IF EXISTS conversations_fts",
+    "DROP TABLE conversations",
+]
+
+# Unix time of a "YYYY-MM-DD HH:MM:SS" local timestamp, or None
+def parse_timestamp(value):
+    try:
+        return int(time.mktime(time.strptime(value, "%Y-%m-%d %H:%M:%S")))
+    except (TypeError, ValueError):
+        return None
+
+# Convert the conversations table; returns (turns, sessions) migrated, or None
+# if there is nothing to migrate
+def migrate(path=None):
+    with db.transaction(path) as conn:
+        legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations'").fetchone()
+        if not legacy:
+            return None
+        chat_store.init_chat_tables(conn, check_legacy=False)
+        rows = conn.execute(
+            "SELECT timestamp, user_message, assistant_message, model, system_prompt, username FROM conversations ORDER BY id"
+        ).fetchall()
+        # Per user: (model, system_prompt, time of last turn, session id)
+        open_sessions = {}
+        sessions = 0
+        for timestamp, user_message, assistant_message, model, system_prompt, username in rows:
+            username = username or ""
+            system_prompt = system_prompt or ""
+            current = open_sessions.get(username)
+            created_at = parse_timestamp(timestamp) or (current[2] if current else 0)
+            if (current is None or current[0] != model or current[1] != system_prompt
+                    or created_at - current[2] > SESSION_GAP):
+                session_id = chat_store.get_session_id(
+                    conn, chat_store.new_session_key(), username, model, system_prompt, created_at
+                )
+                sessions += 1
+            else:
+                session_id = current[3]
+            chat_store.insert_turn(conn, session_id, username, user_message or "", assistant_message or "", created_at)
+            open_sessions[username] = (model, system_prompt, created_at, session_id)
+        for sql in LEGACY_DROP_SQL:
+            conn.execute(sql)
+        # Built after the bulk insert, indexing every migrated message at once
+        init_search_index(conn)
+    return len(rows), sessions
+
+def file_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def main(argv):
+    path = argv[0] if argv else db.DB_PATH
+    if not os.path.exists(path):
+        print(f"{path} does not exist")
+        return 1
+    before = file_size(path)
+    result = migrate(path)
+    if result is None:
+        print(f"{path} has no conversations table; nothing to migrate")
+        return 0
+    conn = db.get_connection(path)
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    turns, sessions = result
+    print(f"Migrated {turns} turns into {sessions} sessions; "
+          f"{path} went from {before / 1024:.0f} KB to {file_size(path) / 1024:.0f} KB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+import http_client
+
+# On-disk copy of the OpenRouter model catalog, keyed by API base URL
+CATALOG_CACHE_PATH = os.environ.get("MODELS_CACHE_PATH", "models_cache.json")
+
+# After a failed fetch, background refreshes of that base URL wait this many
+# seconds before trying again
+REFRESH_RETRY_DELAY = 300
+
+# How long a cached catalog is used before it is revalidated with the server
+CATALOG_TTL = float(os.environ.get("MODELS_CACHE_TTL", 6 * 3600))
+
+_lock = threading.Lock()
+_catalogs = None
+_refreshing = set()
+_failed_at = {}
+
+def is_openrouter(base_url):
+    host = urlsplit(base_url or "").hostname or ""
+    return host == "openrouter.ai" or host.endswith(".openrouter.ai")
+
+def _load_file():
+    global _catalogs
+    if _catalogs is None:
+        try:
+            with open(CATALOG_CACHE_PATH, 'r', encoding='utf-8') as f:
+                _catalogs = json.load(f)
+        except (OSError, ValueError):
+            _catalogs = {}
+    return _catalogs
+
+def _save_file():
+    # Write to a temp file first so a crash never leaves a half-written cache
+    tmp_path = CATALOG_CACHE_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(_catalogs, f)
+    os.replace(tmp_path, CATALOG_CACHE_PATH)
+
+# Keep only the fields the app uses from each /models entry
+def parse_catalog(models_data):
+    models = []
+    for model in models_data.get('data', []):
+        if 'id' in model and 'name' in model:
+            models.append({
+                'id': model['id'],
+                'name': model['name'],
+                'context_length': model.get('context_length'),
+            })
+    return models
+
+def model_map(models):
+    # Use the model's name as the key and ID as the value
+    return {model['name']: model['id'] for model in models}
+
+def get_catalog(base_url):
+    with _lock:
+        return _load_file().get(base_url)
+
+# Cached name -> ID map for base_url, even if stale; None if nothing is cached
+def load_cached_models(base_url):
+    catalog = get_catalog(base_url)
+    return model_map(catalog['models']) if catalog else None
+
+def is_fresh(catalog):
+    return catalog is not None and time.time() - catalog['fetched_at'] < CATALOG_TTL
+
+# Catalog entry for a model ID from any cached base URL, or None
+def get_model_info(model_id):
+    with _lock:
+        for catalog in _load_file().values():
+            for model in catalog['models']:
+                if model['id'] == model_id:
+                    return model
+    return None
+
+# Fetch the catalog unless the cached copy is still fresh (or force is set).
+# Sends the cached ETag/Last-Modified so an unchanged catalog costs a 304.
+# Returns the name -> ID map, or None if the fetch failed (a cached copy is
+# kept and load_cached_models still returns it).
+# Without an api_key the request is sent unauthenticated.
+def refresh_models(api_key, base_url, force=False):
+    catalog = get_catalog(base_url)
+    if not force and is_fresh(catalog):
+        return model_map(catalog['models'])
+
+    headers = {}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    if catalog:
+        if catalog.get('etag'):
+            headers['If-None-Match'] = catalog['etag']
+        if catalog.get('last_modified'):
+            headers['If-Modified-Since'] = catalog['last_modified']
+
+    try:
+        response = http_client.get(f"{base_url}/models", headers=headers)
+        if response.status_code == 304 and catalog:
+            catalog = dict(catalog, fetched_at=time.time())
+        elif response.status_code == 200:
+            catalog = {
+                'fetched_at': time.time(),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'models': parse_catalog(response.json()),
+            }
+        else:
+            print(f"Error fetching models: {response.status_code}")
+            return fetch_failed(base_url)
+    except Exception as e:
+        print(f"Error fetching models: {str(e)}")
+        return fetch_failed(base_url)
+
+    with _lock:
+        _failed_at.pop(base_url, None)
+        _load_file()[base_url] = catalog
+        try:
+            _save_file()
+        except OSError as e:
+            print(f"Warning: Could not save models cache: {str(e)}")
+    return model_map(catalog['models'])
+
+def fetch_failed(base_url):
+    with _lock:
+        _failed_at[base_url] = time.time()
+    return None
+
+# Revalidate a stale catalog on a background thread; on_update gets the new map.
+# Skipped for REFRESH_RETRY_DELAY seconds after a failed fetch.
+def refresh_in_background(api_key, base_url, on_update=None):
+    if is_fresh(get_catalog(base_url)):
+        return None
+    with _lock:
+        if base_url in _refreshing or time.time() - _failed_at.get(base_url, 0) < REFRESH_RETRY_DELAY:
+            return None
+        _refreshing.add(base_url)
+
+    def run():
+        try:
+            models = refresh_models(api_key, base_url)
+            if models and on_update:
+                on_update(models)
+        finally:
+            with _lock:
+                _refreshing.discard(base_url)
+
+    thread = threading.Thread(target=run, name="models-refresh", daemon=True)
+    thread.start()
+    return thread
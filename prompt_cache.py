@@ -0,0 +1,44 @@
+import os
+from context_window import replace_messages
+
+# Provider prompt caching. OpenAI, DeepSeek and similar models cache long
+# prompt prefixes automatically; Anthropic and Gemini models only cache up to
+# explicit cache_control breakpoints, so requests to models whose ID starts
+# with one of these prefixes get them. An empty PROMPT_CACHE_MODELS disables it.
+CACHE_CONTROL_MODELS = [
+    m.strip() for m in os.environ.get("PROMPT_CACHE_MODELS", "anthropic/,google/gemini").split(",") if m.strip()
+]
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+def supports_cache_control(model):
+    return any(model.startswith(prefix) for prefix in CACHE_CONTROL_MODELS)
+
+# Message with its text as a content part carrying a cache breakpoint
+def mark_breakpoint(message):
+    return dict(message, content=[{"type": "text", "text": message["content"], "cache_control": CACHE_CONTROL}])
+
+# Breakpoints go at the end of the system messages (prompt plus any history
+# summary) and at the last message before the new one, so the system prompt is
+# cached on its own and each turn reuses the prefix cached by the turn before.
+# Providers skip caching prefixes below their minimum size, so short prompts
+# cost nothing extra.
+def breakpoint_indexes(messages):
+    indexes = []
+    system_end = 0
+    while system_end < len(messages) and messages[system_end]["role"] == "system":
+        system_end += 1
+    if system_end:
+        indexes.append(system_end - 1)
+    if len(messages) - 2 >= system_end:
+        indexes.append(len(messages) - 2)
+    return [index for index in indexes if isinstance(messages[index].get("content"), str) and messages[index]["content"]]
+
+# Messages to send to model, with cache breakpoints where the model needs them
+def add_cache_breakpoints(messages, model):
+    if not supports_cache_control(model):
+        return messages
+    indexes = breakpoint_indexes(messages)
+    if not indexes:
+        return messages
+    return replace_messages(messages, {index: mark_breakpoint(messages[index]) for index in indexes})
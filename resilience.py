@@ -0,0 +1,142 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+# Retry policy for completion requests: each model gets LLM_RETRY_ATTEMPTS
+# tries with exponential backoff and full jitter, waiting at least as long as
+# the server's Retry-After asks. A wait longer than LLM_RETRY_MAX_WAIT skips
+# straight to the next fallback model instead.
+RETRY_ATTEMPTS = int(os.environ.get("LLM_RETRY_ATTEMPTS", 3))
+RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", 0.5))
+RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", 8))
+RETRY_MAX_WAIT = float(os.environ.get("LLM_RETRY_MAX_WAIT", 20))
+
+# Rate limits, timeouts and upstream/provider failures are worth another try
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504, 520, 522, 524, 529}
+
+# Hedged requests: when the first token takes longer than this percentile of the
+# model's recent first-token latencies, a second identical request is started
+# and whichever answers first is used. Off unless LLM_HEDGE is set.
+HEDGE_ENABLED = os.environ.get("LLM_HEDGE", "").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", 0.95))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", 1.0))
+
+# Latency samples kept per model, and how many are needed before hedging
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+# Raised by a request attempt that failed in a way worth retrying (before any
+# output was produced)
+class RetryableError(Exception):
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+# Seconds from a Retry-After header (delta-seconds or HTTP date), or None
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def status_error(status, body, headers):
+    return RetryableError(f"HTTP {status}: {body}", status, parse_retry_after(headers.get("Retry-After")))
+
+# Wait before retry number attempt (0-based), or None to give up on this model
+def backoff_delay(attempt, retry_after=None):
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    if retry_after is not None:
+        if retry_after > RETRY_MAX_WAIT:
+            return None
+        delay = max(delay, retry_after)
+    return delay
+
+# Recent first-token latencies, by model or any other key
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key, fraction):
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < LATENCY_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+latency = LatencyTracker()
+
+# Seconds to wait for the first token before hedging, or None to not hedge
+def hedge_delay(key):
+    if not HEDGE_ENABLED:
+        return None
+    threshold = latency.percentile(key, HEDGE_PERCENTILE)
+    return max(threshold, HEDGE_MIN_DELAY) if threshold is not None else None
+
+# The requested model followed by the fallbacks, without repeats
+def model_chain(model, fallbacks):
+    chain = [model]
+    for fallback in fallbacks:
+        if fallback not in chain:
+            chain.append(fallback)
+    return chain
+
+async def _close(generator, task):
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+    await generator.aclose()
+
+# Run attempt() (an async generator factory) and return (generator, first item),
+# starting a second attempt if the first item takes longer than delay seconds.
+# Every other attempt is cancelled and closed, including one that produced its
+# first item at the same time. Raises the error of the last attempt to fail.
+async def first_item(attempt, delay=None):
+    generators = {}
+
+    def start():
+        generator = attempt()
+        generators[asyncio.ensure_future(generator.__anext__())] = generator
+
+    start()
+    error = None
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(set(generators), timeout=delay)
+            if not done:
+                start()
+        pending = set(generators)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other, generator in generators.items():
+                        if other is not task:
+                            await _close(generator, other)
+                    return generators[task], task.result()
+                error = task.exception()
+    except asyncio.CancelledError:
+        # The caller went away (e.g. the client disconnected): close every
+        # attempt so its HTTP stream is released now, not at garbage collection
+        for task, generator in generators.items():
+            await _close(generator, task)
+        raise
+    raise error
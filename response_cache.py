@@ -0,0 +1,44 @@
+import os
+import json
+import hashlib
+from cache import TieredCache, MISS
+
+# Opt-in cache of chat completions for identical requests. RESPONSE_CACHE_MODELS
+# is a comma-separated list of model IDs to cache, or "*" for every model;
+# caching is off when it is empty.
+CACHED_MODELS = {m.strip() for m in os.environ.get("RESPONSE_CACHE_MODELS", "").split(",") if m.strip()}
+TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 24 * 3600))
+MAX_MEMORY_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+MAX_DISK_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_DISK_ENTRIES", 20000))
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TieredCache("responses", MAX_MEMORY_ENTRIES, MAX_DISK_ENTRIES, TTL)
+    return _cache
+
+def is_enabled(model):
+    return "*" in CACHED_MODELS or model in CACHED_MODELS
+
+# Canonical hash of everything that determines the completion: endpoint, model,
+# messages and sampling parameters. Streaming does not change the answer.
+def request_key(base_url, data):
+    payload = {k: v for k, v in data.items() if k != "stream"}
+    canonical = json.dumps([base_url, payload], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# Cached reply text, or None on a miss (or when caching is off for the model)
+async def async_lookup(base_url, data):
+    if not is_enabled(data["model"]):
+        return None
+    value = await get_cache().async_get(request_key(base_url, data))
+    return None if value is MISS else value
+
+def store(base_url, data, text):
+    if is_enabled(data["model"]) and text:
+        get_cache().set(request_key(base_url, data), text)
+
+def stats():
+    return get_cache().stats() if _cache is not None else {}
@@ -0,0 +1,285 @@
+import os
+import re
+import asyncio
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+import http_client
+from cache import TieredCache, MISS
+
+# Hybrid search: DuckDuckGo and Wikipedia are queried concurrently, results are
+# deduplicated by URL and merged by reciprocal rank fusion. Whatever has arrived
+# when SEARCH_DEADLINE (seconds) passes is used; slower backends are skipped.
+SEARCH_DEADLINE = float(os.environ.get("SEARCH_DEADLINE", 5))
+
+# Rank fusion constant: higher values flatten the advantage of top-ranked hits
+RRF_K = 60
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+
+# Structured Wikipedia results by (query, num_results)
+wikipedia_cache = TieredCache(
+    "wikipedia",
+    max_memory_entries=256,
+    max_disk_entries=5000,
+    ttl=float(os.environ.get("WIKIPEDIA_CACHE_TTL", 24 * 3600))
+)
+
+# Merged web search results by normalized query, so repeated and popular
+# queries skip the network (and DuckDuckGo's rate limiting)
+search_cache = TieredCache(
+    "search",
+    max_memory_entries=int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", 1024)),
+    max_disk_entries=int(os.environ.get("SEARCH_CACHE_MAX_DISK_ENTRIES", 20000)),
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", 3600))
+)
+
+# Words dropped when normalizing queries for the cache key
+STOP_WORDS = frozenset("""
+a an and are as at be by for from how i in is it of on or the to was what when where which who why with
+""".split())
+
+# Backend calls for the blocking path; shared so concurrent searches reuse threads
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("SEARCH_WORKERS", 16)), thread_name_prefix="search")
+
+# DuckDuckGo backend: results as dicts with title, url, snippet and source
+def ddg_results(query, num_results=5):
+    # Imported on first search rather than at startup
+    from duckduckgo_search import DDGS
+    results = []
+    with DDGS() as ddgs:
+        for r in ddgs.text(query, max_results=num_results):
+            results.append({
+                'title': r.get('title', '[No title]')[:120],
+                'url': r.get('href', r.get('url', '[No URL]')),
+                'snippet': (r.get('body') or r.get('snippet') or '')[:400],
+                'source': 'DuckDuckGo'
+            })
+            if len(results) >= num_results:
+                break
+    return results
+
+def wikipedia_search_params(query, num_results):
+    return {
+        'action': 'query',
+        'list': 'search',
+        'srsearch': query,
+        'format': 'json',
+        'srlimit': num_results
+    }
+
+# One request for the intro extracts of all result pages (the API allows up to 20)
+def wikipedia_summary_params(page_ids):
+    return {
+        'action': 'query',
+        'prop': 'extracts',
+        'exintro': True,
+        'explaintext': True,
+        'exlimit': 'max',
+        'pageids': '|'.join(str(page_id) for page_id in page_ids),
+        'format': 'json'
+    }
+
+# Search hits as (title, pageid) in rank order, or None if the response has no results
+def wikipedia_hits(search_data):
+    if 'query' not in search_data or 'search' not in search_data['query']:
+        return None
+    return [(result['title'], result['pageid']) for result in search_data['query']['search']]
+
+# Pair the search hits with their extracts from the batched summary response
+def wikipedia_entries(hits, summary_data):
+    if 'query' not in summary_data or 'pages' not in summary_data['query']:
+        return []
+    pages = summary_data['query']['pages']
+    search_results = []
+    for title, page_id in hits:
+        page_data = pages.get(str(page_id))
+        if page_data is None:
+            continue
+        snippet = page_data.get('extract', '')
+
+        # Truncate long snippets
+        if len(snippet) > 300:
+            snippet = snippet[:300] + "..."
+
+        search_results.append({
+            'title': title,
+            'url': f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+            'snippet': snippet,
+            'source': 'Wikipedia'
+        })
+    return search_results
+
+def wikipedia_cache_key(query, num_results):
+    return f"{num_results}:{' '.join(query.lower().split())}"
+
+# Wikipedia backend. Two round-trips regardless of num_results: the search,
+# then one batched extracts query. Raises on HTTP errors like ddg_results.
+def wikipedia_results(query, num_results=3):
+    cache_key = wikipedia_cache_key(query, num_results)
+    cached = wikipedia_cache.get(cache_key)
+    if cached is not MISS:
+        return cached
+
+    response = http_client.get(WIKIPEDIA_API_URL, params=wikipedia_search_params(query, num_results))
+    response.raise_for_status()
+    hits = wikipedia_hits(response.json())
+    if not hits:
+        return []
+
+    summary_response = http_client.get(WIKIPEDIA_API_URL, params=wikipedia_summary_params(page_id for _, page_id in hits))
+    summary_response.raise_for_status()
+    results = wikipedia_entries(hits, summary_response.json())
+    if results:
+        wikipedia_cache.set(cache_key, results)
+    return results
+
+async def async_wikipedia_results(query, num_results=3):
+    cache_key = wikipedia_cache_key(query, num_results)
+    cached = await wikipedia_cache.async_get(cache_key)
+    if cached is not MISS:
+        return cached
+
+    response = await http_client.async_get(WIKIPEDIA_API_URL, params=wikipedia_search_params(query, num_results))
+    response.raise_for_status()
+    hits = wikipedia_hits(response.json())
+    if not hits:
+        return []
+
+    summary_response = await http_client.async_get(WIKIPEDIA_API_URL, params=wikipedia_summary_params(page_id for _, page_id in hits))
+    summary_response.raise_for_status()
+    results = wikipedia_entries(hits, summary_response.json())
+    if results:
+        wikipedia_cache.set(cache_key, results)
+    return results
+
+# Key used to spot the same page from different backends
+def url_key(url):
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    # Mobile Wikipedia links (en.m.wikipedia.org) point at the same article
+    host = host.replace('.m.wikipedia.org', '.wikipedia.org')
+    return host + parts.path.rstrip('/') + ('?' + parts.query if parts.query else '')
+
+# Merge ranked lists from several backends with reciprocal rank fusion,
+# keeping the first copy of each URL
+def merge_results(result_lists, num_results):
+    merged = {}
+    order = []
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            key = url_key(result['url'])
+            if key not in merged:
+                merged[key] = [0.0, result]
+                order.append(key)
+            merged[key][0] += 1.0 / (RRF_K + rank + 1)
+    # sorted() is stable, so ties keep backend order
+    ranked = sorted(order, key=lambda key: merged[key][0], reverse=True)
+    return [merged[key][1] for key in ranked[:num_results]]
+
+def format_results(results):
+    formatted_results = ""
+    for i, result in enumerate(results, 1):
+        formatted_results += f"{i}. {result['title']}\n"
+        formatted_results += f"   URL: {result['url']}\n"
+        formatted_results += f"   Source: {result['source']}\n"
+        if result['snippet']:
+            formatted_results += f"   {result['snippet']}\n\n"
+        else:
+            formatted_results += f"   [No description available]\n\n"
+    return formatted_results
+
+def wikipedia_num_results(num_results):
+    return min(3, num_results)
+
+# Fold case, Unicode forms, punctuation, whitespace and stop words so that
+# "What is Python?" and "python" share a cache entry
+def normalize_query(query):
+    text = unicodedata.normalize('NFKC', query).casefold()
+    words = re.findall(r'\w+', text)
+    content_words = [word for word in words if word not in STOP_WORDS]
+    return ' '.join(content_words or words)
+
+def search_cache_key(query, num_results):
+    return f"{num_results}:{normalize_query(query)}"
+
+# Turn per-backend outcomes (lists or exceptions, None if past the deadline) into the text shown to the model
+def format_hybrid(query, outcomes, num_results):
+    result_lists = [outcome for outcome in outcomes if isinstance(outcome, list)]
+    errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    for error in errors:
+        print(f"Search backend error: {str(error)}")
+    results = merge_results(result_lists, num_results)
+    if results:
+        # Partial results (a backend failed or missed the deadline) are not cached
+        if len(result_lists) == len(outcomes):
+            search_cache.set(search_cache_key(query, num_results), results)
+        return format_results(results)
+    if errors and len(errors) == len(outcomes):
+        return f"Error during web search: {str(errors[0])}"
+    return f"No search results found for '{query}'. Try refining your search terms."
+
+# Web search across DuckDuckGo and Wikipedia; total latency is the slowest
+# backend (capped by the deadline) rather than the sum of both
+def web_search(query, num_results=5, deadline=SEARCH_DEADLINE):
+    cached = search_cache.get(search_cache_key(query, num_results))
+    if cached is not MISS:
+        return format_results(cached)
+    futures = [
+        _executor.submit(ddg_results, query, num_results),
+        _executor.submit(wikipedia_results, query, wikipedia_num_results(num_results)),
+    ]
+    wait(futures, timeout=deadline)
+    outcomes = []
+    for future in futures:
+        if not future.done():
+            outcomes.append(None)
+        elif future.exception() is not None:
+            outcomes.append(future.exception())
+        else:
+            outcomes.append(future.result())
+    return format_hybrid(query, outcomes, num_results)
+
+async def async_web_search(query, num_results=5, deadline=SEARCH_DEADLINE):
+    cached = await search_cache.async_get(search_cache_key(query, num_results))
+    if cached is not MISS:
+        return format_results(cached)
+    # duckduckgo_search is a blocking client, so it runs in a worker thread
+    tasks = [
+        asyncio.ensure_future(asyncio.to_thread(ddg_results, query, num_results)),
+        asyncio.ensure_future(async_wikipedia_results(query, wikipedia_num_results(num_results))),
+    ]
+    await asyncio.wait(tasks, timeout=deadline)
+    outcomes = []
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+            outcomes.append(None)
+        elif task.exception() is not None:
+            outcomes.append(task.exception())
+        else:
+            outcomes.append(task.result())
+    return format_hybrid(query, outcomes, num_results)
+
+def format_wikipedia_results(search_results):
+    if not search_results:
+        return None
+    return "Wikipedia Search Results:\n\n" + format_results(search_results)
+
+# Wikipedia-only search, formatted; None if nothing was found or the lookup failed
+def wikipedia_search(query, num_results=3):
+    try:
+        return format_wikipedia_results(wikipedia_results(query, num_results))
+    except Exception as e:
+        print(f"Wikipedia search error: {str(e)}")
+        return None
+
+async def async_wikipedia_search(query, num_results=3):
+    try:
+        return format_wikipedia_results(await async_wikipedia_results(query, num_results))
+    except Exception as e:
+        print(f"Wikipedia search error: {str(e)}")
+        return None
@@ -0,0 +1,32 @@
+import os
+import sys
+
+# Project modules named like a standard library module (an os.py next to
+# app.py, say) get imported instead of the real one whenever the project
+# directory comes first on sys.path. That breaks code expecting the stdlib
+# module and can drag the app's own dependencies into unrelated imports, so
+# startup refuses to continue while one is present.
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Names of project modules and packages in directory that shadow the standard library
+def shadowing_modules(directory=PROJECT_DIR):
+    stdlib = sys.stdlib_module_names
+    found = []
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if entry.endswith(".py"):
+            name = entry[:-3]
+        elif os.path.isfile(os.path.join(path, "__init__.py")):
+            name = entry
+        else:
+            continue
+        if name in stdlib:
+            found.append(name)
+    return found
+
+def check_stdlib_shadowing(directory=PROJECT_DIR):
+    found = shadowing_modules(directory)
+    if found:
+        names = ", ".join(found)
+        raise RuntimeError(f"{directory} has modules shadowing the standard library ({names}); rename them")
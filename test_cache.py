@@ -0,0 +1,64 @@
+import asyncio
+import os
+import threading
+import time
+import cache
+import db
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = cache.LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is cache.MISS
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+
+def test_lru_cache_expires_entries():
+    lru = cache.LRUCache(ttl=0.05)
+    lru.set("a", 1)
+    lru.set("b", 2, ttl=60)
+    time.sleep(0.1)
+    assert lru.get("a") is cache.MISS
+    assert lru.get("b") == 2
+
+def test_tiered_cache_falls_back_to_disk(tmp_path):
+    path = str(tmp_path / "cache.db")
+    tiered = cache.TieredCache("test", max_memory_entries=1, max_disk_entries=2, path=path)
+    # The database is only opened on first use
+    assert not os.path.exists(path)
+    tiered.set("a", {"text": "one"})
+    tiered.set("b", {"text": "two"})
+    tiered.disk.flush()
+    assert tiered.get("a") == {"text": "one"}
+    assert tiered.get("missing") is cache.MISS
+    assert tiered.stats()["disk_hits"] == 1
+    assert tiered.stats()["misses"] == 1
+
+    tiered.set("c", {"text": "three"})
+    tiered.disk.prune()
+    assert db.query_one("SELECT COUNT(*) FROM cache_entries", path=path)[0] == 2
+    db.close_connection(path)
+
+def test_async_get_reads_disk_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    tiered = cache.TieredCache("test", max_memory_entries=1, max_disk_entries=10, path=path)
+    tiered.set("a", "one")
+    tiered.disk.flush()
+    tiered.memory.clear()
+    threads = []
+    disk_get = cache.SQLiteCache.get
+
+    def recording_get(self, key):
+        threads.append(threading.current_thread())
+        return disk_get(self, key)
+
+    monkeypatch.setattr(cache.SQLiteCache, "get", recording_get)
+
+    async def run():
+        return await tiered.async_get("a"), threading.current_thread()
+
+    value, loop_thread = asyncio.run(run())
+    assert value == "one" and threads and loop_thread not in threads
+    db.close_connection(path)
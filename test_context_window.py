@@ -0,0 +1,78 @@
+import asyncio
+import json
+import context_window
+from context_window import Conversation, build_messages, count_tokens
+
+def test_token_counts_never_wait_for_the_encoding(monkeypatch):
+    # While the vocabulary is still loading, counts are estimated
+    monkeypatch.setattr(context_window, "_encoding_loaded", False)
+    monkeypatch.setattr(context_window, "warm_encoding", lambda: None)
+    assert count_tokens("x" * 40) == 10
+
+def test_unknown_model_gets_default_budget_and_fetches_catalog(monkeypatch):
+    fetches = []
+    monkeypatch.setattr(context_window.model_catalog, "get_model_info", lambda model: None)
+    monkeypatch.setattr(context_window.model_catalog, "refresh_in_background", lambda *args: fetches.append(args))
+    monkeypatch.setattr(context_window, "CONTEXT_BUDGET_TOKENS", 0)
+    budget = context_window.token_budget("new/model", "https://openrouter.ai/api/v1")
+    assert budget == context_window.CONTEXT_DEFAULT_LENGTH - context_window.CONTEXT_RESPONSE_RESERVE
+    assert fetches == [(None, "https://openrouter.ai/api/v1")]
+    # Other OpenAI-compatible servers are never asked for OpenRouter's catalog
+    context_window.token_budget("llama3", "http://localhost:11434/v1")
+    assert len(fetches) == 1
+
+def test_conversation_window_keeps_latest_turns_that_fit():
+    history = [("old " * 100, "reply " * 100), ("mid", "reply"), ("new", "reply")]
+    conversation = Conversation()
+    conversation.sync(history)
+    assert conversation.fit(50) == 1
+    assert [m["content"] for m in conversation.window_messages()] == ["mid", "reply", "new", "reply"]
+    assert conversation.fit(0) == 3 and conversation.window == ""
+    # The window grows back when the budget allows it
+    assert conversation.fit(10 ** 6) == 0
+    assert json.loads("[" + conversation.window + "]") == conversation.window_messages()
+
+def test_conversation_appends_only_new_turns_and_resets_on_clear():
+    conversation = Conversation()
+    conversation.sync([("a", "b")])
+    first = conversation.fragments[0]
+    conversation.sync([["a", "b"], ["c", "d"]])
+    assert conversation.fragments[0] is first and len(conversation.turns) == 2
+    conversation.sync([("x", "y")])
+    assert conversation.turns == [("x", "y")]
+
+def test_serialized_messages_match_json_dumps(monkeypatch):
+    monkeypatch.setattr(context_window, "token_budget", lambda model, base_url=None: 100)
+    history = [("q%d " % i * (i % 4), "a%d é" % i) for i in range(20)]
+    conversation = Conversation()
+    for end in range(1, 21):
+        current = "next " * (end % 5) * 10
+        messages = asyncio.run(build_messages("m", "sys", history[:end], current, conversation=conversation))
+        assert messages.serialized == json.dumps(list(messages))
+        assert messages == asyncio.run(build_messages("m", "sys", history[:end], current))
+
+def test_build_messages_trims_and_summarizes_once(monkeypatch):
+    monkeypatch.setattr(context_window, "CONTEXT_SUMMARIZE", True)
+    monkeypatch.setattr(context_window, "SUMMARY_MAX_TOKENS", 20)
+    monkeypatch.setattr(context_window, "token_budget", lambda model, base_url=None: 200)
+    calls = []
+
+    async def summarize(messages):
+        calls.append(messages[-1]["content"])
+        return f"summary {len(calls)}"
+
+    turn = ("question " * 30, "answer " * 30)
+    history = [turn, ("second " * 30, "reply " * 30), ("latest", "ok")]
+    model = f"test/model-{id(calls)}"
+    messages = asyncio.run(build_messages(model, "Be brief.", history, "next", summarize))
+    assert messages[0] == {"role": "system", "content": "Be brief."}
+    assert messages[1]["content"].endswith("summary 1")
+    assert messages[-1] == {"role": "user", "content": "next"}
+    assert sum(count_tokens(m["content"]) + 4 for m in messages) <= 200
+
+    # One more turn falls out of the window: only the new turn is summarized
+    history.append(("another " * 30, "reply " * 30))
+    asyncio.run(build_messages(model, "Be brief.", history, "next", summarize))
+    assert len(calls) == 2
+    assert calls[1].startswith("Summary so far:\nsummary 1")
+    assert "question" not in calls[1]
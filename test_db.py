@@ -0,0 +1,158 @@
+import threading
+import auth
+import chat_store
+import db
+import init_db
+import history_search
+import migrate_db
+from db_writer import WriteBehindQueue, format_writer_stats
+
+def use_temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.close_connection()
+
+def test_connection_is_reused_per_thread(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    assert db.get_connection() is db.get_connection()
+    assert db.query_one("PRAGMA journal_mode")[0] == "wal"
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not db.get_connection()
+    db.close_connection()
+
+def test_register_and_login(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    init_db.init_db()
+    assert auth.register_user("alice", "secret") == (True, "Registration successful!")
+    assert auth.register_user("alice", "other") == (False, "Username already exists.")
+    assert auth.check_login("alice", "secret")
+    assert not auth.check_login("alice", "wrong")
+    db.close_connection()
+
+def test_write_behind_queue_batches_rows(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE items (value INTEGER)")
+
+    writer = WriteBehindQueue("INSERT INTO items (value) VALUES (?)", batch_size=50, flush_interval=5)
+    for i in range(120):
+        writer.put((i,))
+    writer.flush()
+    assert db.query_one("SELECT COUNT(*) FROM items")[0] == 120
+    assert writer.stats()["queue_depth"] == 0
+
+    writer.put((999,))
+    writer.close()
+    assert db.query_one("SELECT COUNT(*) FROM items")[0] == 121
+    assert writer.batches_written >= 3
+    db.close_connection()
+
+def test_full_write_behind_queue_overflows_to_a_thread(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    with db.transaction() as conn:
+        conn.execute("CREATE TABLE items (value INTEGER)")
+
+    writers = []
+
+    class RecordingWriter(WriteBehindQueue):
+        def insert(self, conn, rows):
+            writers.append(threading.current_thread())
+            conn.executemany(self.sql, rows)
+
+    writer = RecordingWriter("INSERT INTO items (value) VALUES (?)", max_queue=1, flush_interval=5)
+    for i in range(20):
+        writer.put((i,))
+    writer.flush()
+    assert db.query_one("SELECT COUNT(*) FROM items")[0] == 20
+    # Rows that didn't fit were never written on the caller's thread
+    assert writer.stats()["rows_overflowed"] > 0 and threading.current_thread() not in writers
+    assert "| items |" in format_writer_stats({"items": writer})
+    writer.close()
+    db.close_connection()
+
+def test_search_conversations_ranks_user_matches(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    init_db.init_db()
+    chat_store.save_turn("s1", "How do I sort a list in Python?", "Use sorted() or list.sort().", "m", "", "alice")
+    chat_store.save_turn("s1", "Tell me about snakes", "Pythons are large snakes.", "m", "", "alice")
+    chat_store.save_turn("s2", "Python packaging", "Use pyproject.toml.", "m", "", "bob")
+    chat_store.chat_writer.flush()
+
+    results = history_search.search_conversations("alice", "python")
+    assert sorted(role for _, _, role, _ in results) == ["assistant", "user"]
+    assert all("**Python" in snippet for _, _, _, snippet in results)
+    assert history_search.search_conversations("bob", "sort") == []
+    # Quotes and FTS operators in user input are treated as plain words
+    assert history_search.search_conversations("alice", 'sort" OR NOT') == []
+    db.close_connection()
+
+def test_turns_are_stored_per_session(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    init_db.init_db()
+    for n in range(5):
+        chat_store.save_turn("chat", f"question {n}", f"answer {n}", "m", "Be brief.", "alice")
+    # Another model in the same chat starts a new session; the prompt is stored once
+    chat_store.save_turn("chat", "question 5", "answer 5", "other", "Be brief.", "alice")
+    chat_store.save_turn("other-chat", "hello", "hi", "m", "", "bob")
+    chat_store.chat_writer.flush()
+
+    assert db.query_one("SELECT COUNT(*) FROM sessions")[0] == 3
+    assert db.query_one("SELECT COUNT(*) FROM system_prompts")[0] == 2
+    page = chat_store.get_conversations_page("alice", limit=4)
+    assert [user for _, user, _ in page] == ["question 5", "question 4", "question 3", "question 2"]
+    older = chat_store.get_conversations_page("alice", before_id=page[-1][0], limit=4)
+    assert [(user, assistant) for _, user, assistant in older] == [("question 1", "answer 1"), ("question 0", "answer 0")]
+    newer = chat_store.get_conversations_page("alice", after_id=older[0][0], limit=2)
+    assert [user for _, user, _ in newer] == ["question 3", "question 2"]
+    db.close_connection()
+
+def test_conversation_pages_read_in_index_order(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    init_db.init_db()
+    pages = [
+        (chat_store.PAGE_SQL.format(condition="", order="DESC"), ("alice", 20)),
+        (chat_store.PAGE_SQL.format(condition="AND u.id < ?", order="DESC"), ("alice", 100, 20)),
+        (chat_store.PAGE_SQL.format(condition="AND u.id > ?", order="ASC"), ("alice", 100, 20)),
+    ]
+    for sql, params in pages:
+        plan = " ".join(row[-1] for row in db.query_all("EXPLAIN QUERY PLAN " + sql, params))
+        assert "idx_messages_user_turns" in plan
+        assert "TEMP B-TREE" not in plan
+    db.close_connection()
+
+def test_login_mid_chat_keeps_turns_with_their_user(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    init_db.init_db()
+    chat_store.save_turn("tab", "before login", "a", "m", "", "")
+    chat_store.save_turn("tab", "after login", "b", "m", "", "alice")
+    chat_store.chat_writer.flush()
+
+    assert [user for _, user, _ in chat_store.get_conversations_page("alice")] == ["after login"]
+    assert [user for _, user, _ in chat_store.get_conversations_page("")] == ["before login"]
+    db.close_connection()
+
+def test_migrate_flat_conversations(tmp_path, monkeypatch):
+    use_temp_db(tmp_path, monkeypatch)
+    with db.transaction() as conn:
+        conn.execute('''CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT,
+            user_message TEXT, assistant_message TEXT, model TEXT, system_prompt TEXT, username TEXT)''')
+        conn.executemany(
+            "INSERT INTO conversations (timestamp, user_message, assistant_message, model, system_prompt, username) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                ("2024-05-01 10:00:00", "Python question", "Python answer", "m", "Long prompt", "alice"),
+                ("2024-05-01 10:05:00", "follow-up", "more", "m", "Long prompt", "alice"),
+                ("2024-05-02 09:00:00", "next day", "hello again", "m", "Long prompt", "alice"),
+            ]
+        )
+
+    assert migrate_db.migrate(str(tmp_path / "test.db")) == (3, 2)
+    assert db.query_one("SELECT name FROM sqlite_master WHERE name = 'conversations'") is None
+    assert db.query_one("SELECT COUNT(*) FROM system_prompts")[0] == 1
+    assert [user for _, user, _ in chat_store.get_conversations_page("alice")] == ["next day", "follow-up", "Python question"]
+    assert db.query_one("SELECT typeof(created_at) FROM messages")[0] == "integer"
+    assert len(history_search.search_conversations("alice", "python")) == 2
+    assert migrate_db.migrate(str(tmp_path / "test.db")) is None
+    db.close_connection()
@@ -0,0 +1,39 @@
+from html_extract import EXTRACTORS, MAX_CHARS, extract_bs4
+
+PAGE = ("<html><head><title> Test &amp; Page </title><script>var x = 1;</script></head><body>"
+        "<header><nav>Home About</nav></header>"
+        "<main><h1>Heading</h1>" + "<p>Body text goes here.</p>" * 20 +
+        "<div class='ad'>Buy now</div><form><input value='q'>Search</form></main>"
+        "<aside class='sidebar'>Related</aside><footer>Copyright</footer></body></html>")
+
+def test_extracts_main_content_without_chrome():
+    text = extract_bs4(PAGE, "https://example.com")
+    assert text.startswith("Title: Test & Page\nURL: https://example.com\n\nHeadingBody text goes here.")
+    for unwanted in ("Home", "Buy now", "Search", "Related", "Copyright", "var x"):
+        assert unwanted not in text
+
+def test_backends_match_reference_output():
+    long_page = "<html><head><title>Long</title></head><body>" + "<p>lorem ipsum dolor</p>" * 2000 + "</body></html>"
+    untitled = "<body><div id='content'>" + "word " * 100 + "<p>one<p>two<br>three</div><div>rest</div></body>"
+    filler = "<p>" + "word " * 60 + "</p>"
+    # Script and style text doesn't make <main> long enough to be the content
+    script_main = "<html><body><main><script>" + "x" * 300 + "</script><p>short</p></main><p>outside</p></body></html>"
+    style_main = "<html><body><main><style>" + "p{}" * 100 + "</style><p>short</p></main><p>outside</p></body></html>"
+    class_case = "<html><body><main>" + filler + "<div class='Ad'>Kept</div><div class='ad'>Buy now</div></main></body></html>"
+    head_noscript = "<html><head><noscript>Enable JS</noscript><title>T</title></head><body>" + filler + "</body></html>"
+    escaped_title = "<html><head><title>How to use &lt;div&gt; tags</title></head><body>" + filler + "</body></html>"
+    template = "<html><body>" + filler + "<template>hidden text</template><p>after</p></body></html>"
+    pages = (PAGE, long_page, untitled, script_main, style_main, class_case, head_noscript, escaped_title, template)
+    for page in pages:
+        reference = extract_bs4(page, "u")
+        for name, extract in EXTRACTORS.items():
+            assert extract(page, "u") == reference, name
+    assert len(extract_bs4(long_page, "u")) <= MAX_CHARS + 40
+    assert extract_bs4(escaped_title, "u").startswith("Title: How to use <div> tags\n")
+
+def test_title_with_elements_matches_html_parser_on_stream():
+    # lxml and lexbor keep tags inside <title> as literal text, per the HTML
+    # spec; html.parser and the stream backend parse them as elements
+    page = "<html><head><title>A <b>bold</b> title</title></head><body><p>text</p></body></html>"
+    assert EXTRACTORS['stream'](page, "u") == extract_bs4(page, "u")
+    assert extract_bs4(page, "u").startswith("Title: No title\n")
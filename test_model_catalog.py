@@ -0,0 +1,40 @@
+import model_catalog
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = {'ETag': '"v1"'}
+
+    def json(self):
+        return self.body
+
+def test_failed_refresh_is_reported_but_keeps_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_catalog, "CATALOG_CACHE_PATH", str(tmp_path / "models.json"))
+    monkeypatch.setattr(model_catalog, "_catalogs", None)
+    base_url = "https://models.test/api/v1"
+    responses = [
+        FakeResponse(200, {"data": [{"id": "a/x", "name": "Model X", "context_length": 4096}]}),
+        FakeResponse(500),
+    ]
+    monkeypatch.setattr(model_catalog.http_client, "get", lambda url, headers=None: responses.pop(0))
+    assert model_catalog.refresh_models("key", base_url, force=True) == {"Model X": "a/x"}
+    assert model_catalog.refresh_models("key", base_url, force=True) is None
+    assert model_catalog.load_cached_models(base_url) == {"Model X": "a/x"}
+
+def test_background_refresh_waits_after_a_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_catalog, "CATALOG_CACHE_PATH", str(tmp_path / "models.json"))
+    monkeypatch.setattr(model_catalog, "_catalogs", None)
+    monkeypatch.setattr(model_catalog, "_failed_at", {})
+    requests_sent = []
+
+    def failing_get(url, headers=None):
+        requests_sent.append(headers)
+        return FakeResponse(503)
+
+    monkeypatch.setattr(model_catalog.http_client, "get", failing_get)
+    base_url = "https://openrouter.ai/api/v1"
+    model_catalog.refresh_in_background(None, base_url).join()
+    assert requests_sent == [{}]
+    assert model_catalog.refresh_in_background(None, base_url) is None
+    assert len(requests_sent) == 1
@@ -0,0 +1,49 @@
+import json
+import app
+import db
+import init_db
+import usage_log
+from context_window import MessageList
+from prompt_cache import add_cache_breakpoints
+
+def message_list(messages):
+    messages = MessageList(messages)
+    messages.serialized = json.dumps(list(messages))
+    return messages
+
+def test_breakpoints_on_system_prompt_and_history():
+    messages = message_list([
+        {"role": "system", "content": "Long instructions"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+        {"role": "user", "content": "next"},
+    ])
+    marked = add_cache_breakpoints(messages, "anthropic/claude-3.5-sonnet")
+    assert [isinstance(m["content"], list) for m in marked] == [True, False, True, False]
+    assert marked[2]["content"][0] == {"type": "text", "text": "hello", "cache_control": {"type": "ephemeral"}}
+    assert marked.serialized == json.dumps(list(marked))
+    # The original list is left alone, and models that cache automatically get it unchanged
+    assert messages[0]["content"] == "Long instructions"
+    assert add_cache_breakpoints(messages, "openai/gpt-4o") is messages
+
+def test_usage_summary_per_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.close_connection()
+    init_db.init_db()
+    usage = {"prompt_tokens": 1000, "completion_tokens": 50, "prompt_tokens_details": {"cached_tokens": 800}, "cost": 0.002}
+    usage_log.record_usage("anthropic/claude-3-haiku", usage, 0.2, 1.0)
+    usage_log.record_usage("anthropic/claude-3-haiku", dict(usage, prompt_tokens_details={}), 0.6, 1.5)
+    # A response without usage counts as a request but not in the cache split
+    usage_log.record_usage("anthropic/claude-3-haiku", None, 3.0, 4.0)
+    usage_log.record_usage("anthropic/claude-3-haiku", {"prompt_tokens_details": None})
+    rows = usage_log.usage_summary()
+    assert rows == [("anthropic/claude-3-haiku", 4, 2000, 800, 0.004, 200.0, 600.0)]
+    assert "800 (40%)" in usage_log.format_usage_summary(rows)
+    db.close_connection()
+
+def test_usage_requested_only_from_openrouter():
+    messages = [{"role": "user", "content": "hi"}]
+    _, _, data = app.openrouter_request(messages, "openai/gpt-4o", "key", "https://openrouter.ai/api/v1", False)
+    assert data["usage"] == {"include": True}
+    _, _, data = app.openrouter_request(messages, "llama3", "key", "http://localhost:11434/v1", True)
+    assert "usage" not in data and data["stream"]
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+import app
+import resilience
+from resilience import RetryableError, backoff_delay, first_item, model_chain, parse_retry_after
+
+def test_retry_after_and_backoff():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert 0 <= backoff_delay(0) <= resilience.RETRY_BASE_DELAY
+    assert backoff_delay(0, retry_after=2) >= 2
+    # Waits longer than the limit move on to the next model instead
+    assert backoff_delay(0, retry_after=resilience.RETRY_MAX_WAIT + 1) is None
+
+def test_model_chain_skips_repeats():
+    assert model_chain("a/x", ["b/y", "a/x", "b/y"]) == ["a/x", "b/y"]
+
+def test_first_item_hedges_slow_attempt():
+    started = []
+
+    async def attempt():
+        started.append(len(started))
+        await asyncio.sleep(1 if len(started) == 1 else 0.01)
+        yield f"attempt {len(started)}"
+
+    async def run():
+        generator, item = await first_item(attempt, delay=0.05)
+        return item
+
+    assert asyncio.run(run()) == "attempt 2"
+    assert len(started) == 2
+
+def test_first_item_closes_attempts_that_finish_together():
+    closed = []
+
+    async def attempt():
+        try:
+            await asyncio.sleep(0.1)
+            yield "item"
+        finally:
+            closed.append(True)
+
+    async def run():
+        # Both attempts are waiting on the same sleep when the second one starts
+        generator, item = await first_item(attempt, delay=0)
+        assert closed == [True]
+        await generator.aclose()
+
+    asyncio.run(run())
+
+def test_first_item_closes_attempts_when_cancelled():
+    closed = []
+
+    # Stands in for an attempt's generator and records aclose()
+    class SlowAttempt:
+        async def __anext__(self):
+            await asyncio.sleep(10)
+
+        async def aclose(self):
+            closed.append(self)
+
+    async def run():
+        task = asyncio.ensure_future(first_item(SlowAttempt, delay=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Both the original and the hedged attempt are closed
+        assert len(closed) == 2
+
+    asyncio.run(run())
+
+def test_first_item_raises_last_error():
+    async def attempt():
+        raise RetryableError("busy", 503)
+        yield
+
+    with pytest.raises(RetryableError):
+        asyncio.run(first_item(attempt, delay=0.05))
+
+# Fake completion attempts for app.async_resilient_attempts: calls records the
+# model of every attempt, and outcome(model, call number) says what it does
+def fake_attempt(calls, outcome):
+    async def attempt(url, headers, data):
+        calls.append(data["model"])
+        result = await outcome(data["model"], len(calls))
+        yield result
+        yield {"model": data["model"], "usage": None}
+    return attempt
+
+def resilient_items(attempt, model="a/x"):
+    async def run():
+        return [item async for item in app.async_resilient_attempts(attempt, "url", {}, {"model": model})]
+
+    return asyncio.run(run())
+
+def test_resilient_attempts_retry_then_succeed(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    calls = []
+
+    async def outcome(model, call):
+        if call == 1:
+            raise RetryableError("busy", 503)
+        return "hello"
+
+    assert resilient_items(fake_attempt(calls, outcome)) == ["hello", {"model": "a/x", "usage": None}]
+    assert calls == ["a/x", "a/x"]
+
+def test_resilient_attempts_fall_back_to_next_model(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(app, "fallback_models", lambda: ["b/y"])
+    calls = []
+
+    async def outcome(model, call):
+        if model == "a/x":
+            raise RetryableError("busy", 503)
+        return "from b"
+
+    items = resilient_items(fake_attempt(calls, outcome))
+    assert items == ["from b", {"model": "b/y", "usage": None}]
+    assert calls == ["a/x"] * resilience.RETRY_ATTEMPTS + ["b/y"]
+
+def test_resilient_attempts_hedge_slow_first_token(monkeypatch):
+    monkeypatch.setattr(resilience, "hedge_delay", lambda key: 0.05)
+    calls = []
+
+    async def outcome(model, call):
+        await asyncio.sleep(1 if call == 1 else 0)
+        return f"attempt {call}"
+
+    assert resilient_items(fake_attempt(calls, outcome)) == ["attempt 2", {"model": "a/x", "usage": None}]
+    assert calls == ["a/x", "a/x"]
+
+def test_resilient_attempts_report_error_when_every_model_fails(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(app, "fallback_models", lambda: [])
+    calls = []
+
+    async def outcome(model, call):
+        raise RetryableError("overloaded", 529)
+
+    assert resilient_items(fake_attempt(calls, outcome)) == ["Error: overloaded"]
@@ -0,0 +1,24 @@
+from search_engine import merge_results, normalize_query, url_key
+
+def result(url, source):
+    return {'title': url, 'url': url, 'snippet': '', 'source': source}
+
+def test_url_key_matches_same_page():
+    assert url_key("https://www.python.org/") == url_key("http://python.org")
+    assert url_key("https://en.m.wikipedia.org/wiki/Python") == url_key("https://en.wikipedia.org/wiki/Python")
+
+def test_merge_results_dedupes_and_ranks_shared_hits_first():
+    ddg = [result("https://a.com", "DuckDuckGo"), result("https://en.wikipedia.org/wiki/X", "DuckDuckGo")]
+    wiki = [result("https://en.wikipedia.org/wiki/X", "Wikipedia"), result("https://en.wikipedia.org/wiki/Y", "Wikipedia")]
+    merged = merge_results([ddg, wiki], num_results=5)
+    assert [r['url'] for r in merged] == [
+        "https://en.wikipedia.org/wiki/X",
+        "https://a.com",
+        "https://en.wikipedia.org/wiki/Y",
+    ]
+    assert len(merge_results([ddg, wiki], num_results=2)) == 2
+
+def test_normalize_query_folds_case_punctuation_and_stop_words():
+    assert normalize_query("What is  Python?") == normalize_query("python")
+    assert normalize_query("The Who") == "the who"
+    assert normalize_query("python 3") != normalize_query("python")
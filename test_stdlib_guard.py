@@ -0,0 +1,14 @@
+import pytest
+import stdlib_guard
+
+def test_project_does_not_shadow_stdlib():
+    assert stdlib_guard.shadowing_modules() == []
+
+def test_shadowing_modules_are_reported(tmp_path):
+    (tmp_path / "os.py").write_text("")
+    (tmp_path / "auth.py").write_text("")
+    (tmp_path / "json").mkdir()
+    (tmp_path / "json" / "__init__.py").write_text("")
+    assert stdlib_guard.shadowing_modules(str(tmp_path)) == ["json", "os"]
+    with pytest.raises(RuntimeError, match="json, os"):
+        stdlib_guard.check_stdlib_shadowing(str(tmp_path))
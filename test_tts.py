@@ -0,0 +1,91 @@
+import asyncio
+import os
+import wave
+from concurrent.futures import Future
+import tts
+from audio_cache import AudioCache, audio_key
+from tts import SpeechStream, chunk_end
+
+def test_chunk_end_waits_for_enough_text():
+    assert chunk_end("Hi. ", 0) is None
+    text = "This is the first sentence of the reply. And a second"
+    assert chunk_end(text, 0) == text.index("And")
+    assert chunk_end("यो पहिलो वाक्य हो र यो अलि लामो छ ताकि पुगोस्। अर्को", 0) is not None
+
+# Synthesizer that writes one frame of silence per character, finishing jobs on demand
+class FakeSynth:
+    def __init__(self, directory):
+        self.directory = directory
+        self.jobs = []
+
+    def __call__(self, text, lang):
+        future = Future()
+        filename = os.path.join(self.directory, f"{len(self.jobs)}.wav")
+        self.jobs.append((text, filename, future))
+        return future
+
+    def finish(self, index):
+        text, filename, future = self.jobs[index]
+        with wave.open(filename, 'wb') as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(16000)
+            audio.writeframes(b'\x00\x00' * len(text))
+        future.set_result(filename)
+
+def test_speech_stream_plays_chunks_in_order(tmp_path):
+    synth = FakeSynth(str(tmp_path))
+    speech = SpeechStream('en', synthesize=synth)
+    reply = "This is the first sentence of the reply. "
+    speech.feed(reply)
+    speech.feed(reply + "Still going")
+    assert [job[0] for job in synth.jobs] == [reply.strip()]
+    assert speech.ready() == b''
+
+    synth.finish(0)
+    first = speech.ready()
+    header = tts.stream_header((1, 2, 16000))
+    assert first == header + b'\x00\x00' * len(reply.strip())
+
+    speech.close(reply + "Still going.")
+    assert synth.jobs[1][0] == "Still going."
+    synth.finish(1)
+
+    async def rest():
+        return [audio async for audio in speech.rest()]
+
+    # Later chunks are bare frames
+    assert asyncio.run(rest()) == [b'\x00\x00' * len("Still going.")]
+
+def test_failed_chunk_is_skipped(tmp_path):
+    synth = FakeSynth(str(tmp_path))
+    speech = SpeechStream('en', synthesize=synth)
+    speech.close("Short reply.")
+    synth.jobs[0][2].set_exception(RuntimeError("TTS engine unavailable"))
+
+    async def rest():
+        return [audio async for audio in speech.rest()]
+
+    assert asyncio.run(rest()) == [b'']
+
+def test_audio_cache_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    keys = [audio_key(f"reply {n}", 'en', 'voice') for n in range(3)]
+    assert len(set(keys)) == 3 and audio_key("reply 0", 'ne', 'voice') != keys[0]
+    for n, key in enumerate(keys[:2]):
+        partial = cache.partial_path(key)
+        with open(partial, 'wb') as f:
+            f.write(b'x' * 100)
+        assert cache.store(key, partial) == cache.path(key)
+        os.utime(cache.path(key), (n, n))
+    # Reading the first reply makes the second one the least recently used
+    assert cache.get(keys[0]) == cache.path(keys[0])
+    assert cache.get(keys[2]) is None
+
+    partial = cache.partial_path(keys[2])
+    with open(partial, 'wb') as f:
+        f.write(b'x' * 100)
+    cache.store(keys[2], partial)
+    cache.prune()
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) and cache.get(keys[2])
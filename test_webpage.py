@@ -0,0 +1,64 @@
+import db
+import webpage
+from cache import TieredCache
+from webpage import PageReader, content_type_error, sniff_charset
+
+def test_content_type_checked_before_download():
+    assert content_type_error("u", {'Content-Type': 'application/pdf'}).startswith("Error:")
+    assert content_type_error("u", {'Content-Type': 'text/html; charset=utf-8'}) is None
+    assert content_type_error("u", {}) is None
+
+def test_charset_sniffed_from_first_chunk():
+    assert sniff_charset("<meta charset='windows-1251'>".encode()) == 'cp1251'
+    assert sniff_charset(b'\xef\xbb\xbf<html>') == 'utf-8-sig'
+    # A multi-byte character split at the end of the chunk is still UTF-8
+    assert sniff_charset('<p>café'.encode()[:-1]) == 'utf-8'
+
+def test_reader_decodes_incrementally_and_stops_at_cap():
+    reader = PageReader({'Content-Type': 'text/html; charset=utf-8'}, max_bytes=10)
+    data = 'ééé'.encode()
+    assert reader.feed(data[:1])
+    assert reader.feed(data[1:])
+    assert not reader.feed(b'0123456789')
+    assert reader.size == 10
+    assert reader.text() == 'ééé0123'
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+def test_page_cache_keeps_text_and_revalidates(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    monkeypatch.setattr(webpage, "page_cache", TieredCache("pages", path=path))
+    monkeypatch.setattr(webpage, "page_text_cache", TieredCache("page_text", path=path))
+    responses = [
+        FakeResponse(200, b"<html><body><p>Cached page text</p></body></html>", {'Content-Type': 'text/html', 'ETag': '"v1"'}),
+        FakeResponse(304),
+    ]
+    requests_sent = []
+
+    def fake_get(url, headers=None, **kwargs):
+        requests_sent.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(webpage.http_client, "get", fake_get)
+    monkeypatch.setattr(webpage, "PAGE_CACHE_FRESH", 0)
+    url = "https://example.test/cached-page"
+    text = webpage.get_webpage_content(url)
+    assert "Cached page text" in text
+    # Only the extracted text is cached, not the HTML
+    entry = webpage.cached_page(url)
+    assert entry['text'] == text and 'html' not in entry
+    assert webpage.get_webpage_content(url) == text
+    assert requests_sent[1]['If-None-Match'] == '"v1"'
+    webpage.page_cache.disk.flush()
+    webpage.page_text_cache.disk.flush()
+    db.close_connection(path)
@@ -0,0 +1,230 @@
+import os
+import re
+import queue
+import struct
+import wave
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+from audio_cache import AudioCache, audio_key
+
+# Speech is synthesized by long-lived pyttsx3 engines, each owned by its own
+# worker thread (the espeak and SAPI5 drivers must stay on the thread that
+# created them). espeak keeps global state, so more than one worker only helps
+# with drivers that allow several engines in one process.
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", 1))
+
+# Replies are spoken in chunks of at least this many characters, cut at
+# sentence ends, so the first sentence plays while the rest is synthesized
+MIN_CHUNK_CHARS = int(os.environ.get("TTS_MIN_CHUNK_CHARS", 40))
+
+# How to recognize each language's voice among the installed ones
+VOICE_HINTS = {
+    'en': ('en', 'English'),
+    # Nepali support depends on system voices; falls back to the default voice if not found
+    'ne': ('ne', 'Nepali'),
+}
+
+# End of a sentence (including the Devanagari danda) or of a paragraph, followed by whitespace
+SENTENCE_END_RE = re.compile(r'[.!?।]+["\'”’)\]]*\s+|\n\s*\n')
+
+# Voice ID for each language, looked up once per engine
+def resolve_voices(engine):
+    voices = engine.getProperty('voices') or []
+    resolved = {}
+    for lang, (code, name) in VOICE_HINTS.items():
+        voice = next((v for v in voices if code in v.id or name in (v.name or '')), None)
+        if voice:
+            resolved[lang] = voice.id
+    return resolved
+
+# Voice used for lang, or None for the engine's default
+def voice_for(voices, lang):
+    return voices.get(lang, voices.get('en'))
+
+class TTSWorker(threading.Thread):
+    def __init__(self, pool, index):
+        super().__init__(name=f"tts-worker-{index}", daemon=True)
+        self.pool = pool
+
+    def run(self):
+        try:
+            # Imported here, on the worker's thread, so startup doesn't pay for it
+            import pyttsx3
+            engine = pyttsx3.Engine()
+            voices = resolve_voices(engine)
+            self.pool.set_voices(voices)
+        except Exception as e:
+            print(f"pyttsx3 TTS error: {e}")
+            engine = None
+        cache = self.pool.cache
+        current_voice = None
+        while True:
+            job = self.pool.jobs.get()
+            if job is None:
+                return
+            text, lang, future = job
+            if engine is None:
+                future.set_exception(RuntimeError("TTS engine unavailable"))
+                continue
+            voice = voice_for(voices, lang)
+            key = audio_key(text, lang, voice)
+            path = cache.get(key)
+            if path:
+                future.set_result(path)
+                continue
+            partial = None
+            try:
+                if voice and voice != current_voice:
+                    engine.setProperty('voice', voice)
+                    current_voice = voice
+                partial = cache.partial_path(key)
+                engine.save_to_file(text, partial)
+                engine.runAndWait()
+                future.set_result(cache.store(key, partial))
+            except Exception as e:
+                if partial and os.path.exists(partial):
+                    os.remove(partial)
+                future.set_exception(e)
+
+# Queue of synthesis jobs shared by the workers; submit() returns a
+# concurrent.futures.Future for the path of the cached WAV file. Audio that is
+# already cached comes back at once, and identical requests in flight share
+# one synthesis.
+class TTSPool:
+    def __init__(self, workers=TTS_WORKERS, cache=None):
+        self.cache = cache or AudioCache()
+        self.jobs = queue.Queue()
+        self.voices = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._workers = [TTSWorker(self, index) for index in range(max(workers, 1))]
+        for worker in self._workers:
+            worker.start()
+
+    # Called by each worker once its engine is up; every engine finds the same voices
+    def set_voices(self, voices):
+        with self._lock:
+            if self.voices is None:
+                self.voices = voices
+
+    def submit(self, text, lang='en'):
+        with self._lock:
+            future = self._in_flight.get((text, lang))
+            if future is not None:
+                return future
+            # Until a worker has resolved the voices, the worker checks the cache instead
+            if self.voices is not None:
+                path = self.cache.get(audio_key(text, lang, voice_for(self.voices, lang)))
+                if path:
+                    future = Future()
+                    future.set_result(path)
+                    return future
+            future = Future()
+            self._in_flight[(text, lang)] = future
+        future.add_done_callback(lambda _: self._finished(text, lang))
+        self.jobs.put((text, lang, future))
+        return future
+
+    def _finished(self, text, lang):
+        with self._lock:
+            self._in_flight.pop((text, lang), None)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TTSPool()
+        return _pool
+
+# Synthesize text (or find it in the cache) and wait for it; returns the path
+# of the WAV file, or None on failure
+def text_to_speech(text, lang='en'):
+    try:
+        return get_pool().submit(text, lang).result()
+    except Exception as e:
+        print(f"pyttsx3 TTS error: {e}")
+        return None
+
+def read_wav(filename):
+    with wave.open(filename, 'rb') as audio:
+        params = (audio.getnchannels(), audio.getsampwidth(), audio.getframerate())
+        return params, audio.readframes(audio.getnframes())
+
+# WAV header for a stream of unknown length; later chunks are bare PCM frames
+def stream_header(params):
+    channels, sample_width, rate = params
+    return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, rate, rate * channels * sample_width,
+                                    channels * sample_width, sample_width * 8)
+            + b'data' + struct.pack('<I', 0xFFFFFFFF))
+
+# End offset of the last sentence in text[start:] that completes a chunk, or None
+def chunk_end(text, start):
+    end = None
+    for match in SENTENCE_END_RE.finditer(text, start):
+        if match.end() - start >= MIN_CHUNK_CHARS:
+            end = match.end()
+    return end
+
+# Speaks a reply while it streams in: each completed chunk of sentences is sent
+# to the pool as soon as it appears, and the audio comes back in order as WAV
+# bytes for a streaming gr.Audio (a header first, then raw frames).
+class SpeechStream:
+    def __init__(self, lang='en', synthesize=None):
+        self.lang = lang
+        self.synthesize = synthesize or get_pool().submit
+        self.spoken = 0
+        self.pending = deque()
+        self.params = None
+
+    # Called with the reply so far
+    def feed(self, text):
+        end = chunk_end(text, self.spoken)
+        if end is not None:
+            self._submit(text[self.spoken:end])
+            self.spoken = end
+
+    # Called with the full reply once it is complete
+    def close(self, text):
+        self._submit(text[self.spoken:])
+        self.spoken = len(text)
+
+    def _submit(self, text):
+        if text.strip():
+            self.pending.append(self.synthesize(text.strip(), self.lang))
+
+    def _audio(self, future):
+        try:
+            filename = future.result()
+            params, frames = read_wav(filename)
+        except Exception as e:
+            print(f"pyttsx3 TTS error: {e}")
+            return b''
+        if self.params is None:
+            self.params = params
+            return stream_header(params) + frames
+        if params != self.params:
+            print("pyttsx3 TTS error: audio format changed mid-reply, skipping chunk")
+            return b''
+        return frames
+
+    # Audio for the chunks finished so far, in order (b'' if none)
+    def ready(self):
+        audio = []
+        while self.pending and self.pending[0].done():
+            audio.append(self._audio(self.pending.popleft()))
+        return b''.join(audio)
+
+    # Wait for the remaining chunks, yielding each one's audio as it completes
+    async def rest(self):
+        while self.pending:
+            try:
+                await asyncio.wrap_future(self.pending[0])
+            except Exception:
+                pass  # reported by _audio
+            yield self.ready()
@@ -0,0 +1,89 @@
+import time
+import db
+from db_writer import WriteBehindQueue
+
+# Token usage, cost and latency of each completion, from the usage block
+# OpenRouter returns with the response. Kept in the chat database so cached
+# prompt tokens and their effect on latency can be compared per model.
+USAGE_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS model_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cached_tokens INTEGER,
+    cache_write_tokens INTEGER,
+    cost REAL,
+    first_token_ms INTEGER,
+    total_ms INTEGER
+)
+'''
+
+INSERT_USAGE_SQL = '''INSERT INTO model_usage (created_at, model, prompt_tokens, completion_tokens, cached_tokens,
+    cache_write_tokens, cost, first_token_ms, total_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+SUMMARY_SQL = '''
+SELECT model,
+       COUNT(*),
+       SUM(prompt_tokens),
+       SUM(cached_tokens),
+       SUM(cost),
+       AVG(CASE WHEN cached_tokens > 0 THEN first_token_ms END),
+       AVG(CASE WHEN prompt_tokens IS NOT NULL AND COALESCE(cached_tokens, 0) = 0 THEN first_token_ms END)
+FROM model_usage
+GROUP BY model
+ORDER BY COUNT(*) DESC
+'''
+
+# Create the usage table inside an open transaction
+def init_usage_table(conn):
+    conn.execute(USAGE_TABLE_SQL)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_model_usage_model ON model_usage (model, created_at)")
+
+usage_writer = WriteBehindQueue(INSERT_USAGE_SQL, name="usage-writer")
+
+# Record one completion; usage is the response's "usage" object (None if it
+# had none, e.g. from a server other than OpenRouter, in which case only the
+# latencies are kept), latencies are in seconds since the request was sent
+def record_usage(model, usage, first_token_latency=None, total_latency=None):
+    if not isinstance(usage, dict):
+        usage = {}
+    details = usage.get("prompt_tokens_details")
+    if not isinstance(details, dict):
+        details = {}
+    usage_writer.put((
+        int(time.time()),
+        model,
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+        details.get("cached_tokens"),
+        details.get("cache_write_tokens"),
+        usage.get("cost"),
+        int(first_token_latency * 1000) if first_token_latency is not None else None,
+        int(total_latency * 1000) if total_latency is not None else None,
+    ))
+
+def usage_summary():
+    usage_writer.flush()
+    return db.query_all(SUMMARY_SQL)
+
+def format_ms(value):
+    return f"{value:.0f} ms" if value is not None else "–"
+
+# Markdown table of usage per model
+def format_usage_summary(rows):
+    if not rows:
+        return "No usage recorded yet."
+    lines = [
+        "| Model | Requests | Prompt tokens | Cached | Cost | First token (cached) | First token (uncached) |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for model, requests, prompt_tokens, cached_tokens, cost, cached_ms, uncached_ms in rows:
+        prompt_tokens = prompt_tokens or 0
+        cached_tokens = cached_tokens or 0
+        share = f"{cached_tokens / prompt_tokens:.0%}" if prompt_tokens else "–"
+        cost = f"${cost:.4f}" if cost is not None else "–"
+        lines.append(f"| {model} | {requests} | {prompt_tokens} | {cached_tokens} ({share}) | {cost} | "
+                     f"{format_ms(cached_ms)} | {format_ms(uncached_ms)} |")
+    return "\n".join(lines)
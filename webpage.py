@@ -0,0 +1,248 @@
+import os
+import re
+import codecs
+import asyncio
+import hashlib
+import time
+import httpx
+import requests
+from requests.compat import chardet
+import http_client
+from html_extract import extract_webpage_text
+from cache import TieredCache, MISS
+
+# Browser-like headers so sites serve the regular HTML page
+WEBPAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+def normalize_url(url):
+    # Check if URL has a scheme, add https:// if not
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+# Bodies are downloaded in chunks and cut off after PAGE_MAX_BYTES, so a huge
+# page or a binary file can't exhaust memory; the text sent to the model is
+# capped at 8000 chars anyway.
+PAGE_MAX_BYTES = int(os.environ.get("PAGE_MAX_BYTES", 2 * 1024 * 1024))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Content types that are worth downloading and parsing (a missing header is allowed)
+PAGE_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'application/xml', 'text/xml')
+
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+# Checked before any of the body is read; returns an error message or None
+def content_type_error(url, headers):
+    content_type = headers.get('Content-Type', '')
+    mime_type = content_type.split(';')[0].strip().lower()
+    if mime_type and mime_type not in PAGE_CONTENT_TYPES:
+        return f"Error: {url} is not a web page (Content-Type: {mime_type})."
+    return None
+
+# Normalized codec name, or None if Python doesn't know the encoding
+def codec_name(encoding):
+    try:
+        return codecs.lookup(encoding).name if encoding else None
+    except LookupError:
+        return None
+
+def header_charset(headers):
+    for param in headers.get('Content-Type', '').split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            return codec_name(value.strip().strip('"\''))
+    return None
+
+# Guess the encoding from the first chunk only: BOM, then <meta charset>, then
+# UTF-8 if it decodes cleanly, then statistical detection
+def sniff_charset(chunk):
+    if chunk.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if chunk.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    match = META_CHARSET_RE.search(chunk[:4096])
+    declared = codec_name(match.group(1).decode('ascii', 'ignore')) if match else None
+    if declared:
+        return declared
+    try:
+        # Not final, so a character split at the chunk boundary is fine
+        codecs.getincrementaldecoder('utf-8')().decode(chunk)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    return codec_name(chardet.detect(chunk).get('encoding')) or 'utf-8'
+
+# Decodes a streamed body chunk by chunk, up to max_bytes
+class PageReader:
+    def __init__(self, headers, max_bytes=PAGE_MAX_BYTES):
+        self.charset = header_charset(headers)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.decoder = None
+        self.parts = []
+
+    # Returns False once the size cap is reached and reading should stop
+    def feed(self, chunk):
+        if not chunk:
+            return True
+        if self.decoder is None:
+            encoding = self.charset or sniff_charset(chunk)
+            self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        chunk = chunk[:self.max_bytes - self.size]
+        self.size += len(chunk)
+        self.parts.append(self.decoder.decode(chunk))
+        return self.size < self.max_bytes
+
+    def text(self):
+        if self.decoder is not None:
+            self.parts.append(self.decoder.decode(b'', final=True))
+        return ''.join(self.parts)
+
+# Fetched pages by URL: the extracted text plus the ETag/Last-Modified
+# validators used to revalidate it. Only the text is kept, not the HTML, so an
+# entry is a few KB at most (extraction caps it at MAX_CHARS) and is cheap to
+# serialize on the event loop.
+page_cache = TieredCache(
+    "pages",
+    max_memory_entries=256,
+    max_disk_entries=int(os.environ.get("PAGE_CACHE_MAX_ENTRIES", 2000)),
+    ttl=float(os.environ.get("PAGE_CACHE_TTL", 7 * 24 * 3600))
+)
+
+# Extracted text by (content hash, URL), so an unchanged page is parsed only
+# once even when the server sends no validators
+page_text_cache = TieredCache("page_text", max_memory_entries=256, max_disk_entries=5000)
+
+# Seconds a cached page is served without asking the server again
+PAGE_CACHE_FRESH = float(os.environ.get("PAGE_CACHE_FRESH", 60))
+
+# Cached page entry for url, or None (also for entries from before the cache
+# held text instead of HTML)
+def cached_page(url):
+    return page_entry(page_cache.get(url))
+
+async def async_cached_page(url):
+    return page_entry(await page_cache.async_get(url))
+
+def page_entry(entry):
+    return None if entry is MISS or 'text' not in entry else entry
+
+def is_page_fresh(entry):
+    return entry is not None and time.time() - entry['checked_at'] < PAGE_CACHE_FRESH
+
+# Request headers with the cached validators, so an unchanged page comes back as a 304
+def conditional_headers(entry):
+    headers = dict(WEBPAGE_HEADERS)
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+# After a 304: mark the cached copy as just revalidated and return its text
+def revalidated_page(url, entry):
+    page_cache.set(url, dict(entry, checked_at=time.time()))
+    return entry['text']
+
+def store_page(url, response_headers, text):
+    page_cache.set(url, {
+        'text': text,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'checked_at': time.time(),
+    })
+
+def text_cache_key(url, html):
+    return hashlib.sha256(html.encode('utf-8', errors='replace')).hexdigest() + ':' + url
+
+# Function to get webpage content
+def get_webpage_content(url):
+    try:
+        url = normalize_url(url)
+        
+        entry = cached_page(url)
+        if is_page_fresh(entry):
+            return entry['text']
+        # Set a timeout to avoid hanging on slow websites
+        response = http_client.get(url, headers=conditional_headers(entry), stream=True,
+                                   timeout=(http_client.CONNECT_TIMEOUT, 10))
+        try:
+            if response.status_code == 304 and entry:
+                return revalidated_page(url, entry)
+            elif response.status_code != 200:
+                return f"Error: Could not fetch the webpage. Status code: {response.status_code}"
+            error = content_type_error(url, response.headers)
+            if error:
+                return error
+            reader = PageReader(response.headers)
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                if not reader.feed(chunk):
+                    break
+            html = reader.text()
+        finally:
+            response.close()
+        
+        key = text_cache_key(url, html)
+        text = page_text_cache.get(key)
+        if text is MISS:
+            text = extract_webpage_text(html, url)
+            page_text_cache.set(key, text)
+        store_page(url, response.headers, text)
+        return text
+    
+    except requests.exceptions.Timeout:
+        return f"Error: Request to {url} timed out after 10 seconds."
+    except requests.exceptions.ConnectionError:
+        return f"Error: Could not connect to {url}. Please check the URL and try again."
+    except requests.exceptions.MissingSchema:
+        return f"Error: Invalid URL format for {url}. Make sure it includes http:// or https://."
+    except Exception as e:
+        return f"Error fetching webpage: {str(e)}"
+
+async def async_get_webpage_content(url):
+    try:
+        url = normalize_url(url)
+        
+        entry = await async_cached_page(url)
+        if is_page_fresh(entry):
+            return entry['text']
+        async with http_client.async_stream("GET", url, headers=conditional_headers(entry), follow_redirects=True,
+                                            timeout=httpx.Timeout(10, connect=http_client.CONNECT_TIMEOUT)) as response:
+            if response.status_code == 304 and entry:
+                return revalidated_page(url, entry)
+            elif response.status_code != 200:
+                return f"Error: Could not fetch the webpage. Status code: {response.status_code}"
+            error = content_type_error(url, response.headers)
+            if error:
+                return error
+            reader = PageReader(response.headers)
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                if not reader.feed(chunk):
+                    break
+            html = reader.text()
+        
+        key = text_cache_key(url, html)
+        text = await page_text_cache.async_get(key)
+        if text is MISS:
+            # Parsing is CPU-bound, so keep it off the event loop
+            text = await asyncio.to_thread(extract_webpage_text, html, url)
+            page_text_cache.set(key, text)
+        store_page(url, response.headers, text)
+        return text
+    
+    except httpx.TimeoutException:
+        return f"Error: Request to {url} timed out after 10 seconds."
+    except httpx.ConnectError:
+        return f"Error: Could not connect to {url}. Please check the URL and try again."
+    except (httpx.InvalidURL, httpx.UnsupportedProtocol):
+        return f"Error: Invalid URL format for {url}. Make sure it includes http:// or https://."
+    except Exception as e:
+        return f"Error fetching webpage: {str(e)}"